@@ -0,0 +1,29 @@
+"""Add document_summaries cache table
+
+Revision ID: document_summaries
+Revises: ingestion_job_sha256
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "document_summaries"
+down_revision = "ingestion_job_sha256"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "document_summaries",
+        sa.Column("content_sha256", sa.String(64), primary_key=True),
+        sa.Column("model", sa.String(100), primary_key=True),
+        sa.Column("summary", sa.Text, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("document_summaries")
@@ -0,0 +1,39 @@
+"""Add chunk_index to embeddings
+
+Revision ID: embedding_chunk_index
+Revises: document_summaries
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "embedding_chunk_index"
+down_revision = "document_summaries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "embeddings",
+        sa.Column("chunk_index", sa.Integer, nullable=False, server_default="0"),
+    )
+    # Number existing chunks per document in insertion order. Left at 0,
+    # ContextPacker would treat all of a document's chunks as one
+    op.execute(
+        """
+        UPDATE embeddings
+        SET chunk_index = numbered.chunk_index
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY document_id ORDER BY id) - 1 AS chunk_index
+            FROM embeddings
+        ) AS numbered
+        WHERE embeddings.id = numbered.id
+        """
+    )
+
+
+def downgrade():
+    op.drop_column("embeddings", "chunk_index")
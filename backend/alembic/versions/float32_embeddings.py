@@ -0,0 +1,71 @@
+"""Store embeddings as packed little-endian float32 bytes
+
+Revision ID: float32_embeddings
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import numpy as np
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "float32_embeddings"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+embeddings = sa.table(
+    "embeddings",
+    sa.column("id", sa.Integer),
+    sa.column("embedding", postgresql.ARRAY(sa.Float)),
+    sa.column("embedding_f32", sa.LargeBinary),
+)
+
+
+def _convert(source, target, encode):
+    """Copy ``source`` into ``target`` in id-ordered batches."""
+    conn = op.get_bind()
+    update = (
+        embeddings.update()
+        .where(embeddings.c.id == sa.bindparam("row_id"))
+        .values({target.name: sa.bindparam("value")})
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(embeddings.c.id, source)
+            .where(embeddings.c.id > last_id)
+            .order_by(embeddings.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [{"row_id": id, "value": encode(value)} for id, value in rows])
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.add_column("embeddings", sa.Column("embedding_f32", sa.LargeBinary(), nullable=True))
+    _convert(
+        embeddings.c.embedding,
+        embeddings.c.embedding_f32,
+        lambda value: np.asarray(value, dtype="<f4").tobytes(),
+    )
+    op.drop_column("embeddings", "embedding")
+    op.alter_column("embeddings", "embedding_f32", new_column_name="embedding", nullable=False)
+
+
+def downgrade():
+    op.alter_column("embeddings", "embedding", new_column_name="embedding_f32")
+    op.add_column("embeddings", sa.Column("embedding", postgresql.ARRAY(sa.Float), nullable=True))
+    _convert(
+        embeddings.c.embedding_f32,
+        embeddings.c.embedding,
+        lambda value: np.frombuffer(value, dtype="<f4").tolist(),
+    )
+    op.drop_column("embeddings", "embedding_f32")
+    op.alter_column("embeddings", "embedding", nullable=False)
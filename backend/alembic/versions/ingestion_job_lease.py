@@ -0,0 +1,32 @@
+"""Lease running ingestion jobs so several processes can share the queue
+
+Revision ID: ingestion_job_lease
+Revises: ingestion_job_pipeline
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ingestion_job_lease"
+down_revision = "ingestion_job_pipeline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+    )
+    # Running jobs without a lease are treated as abandoned
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("ingestion_jobs", "lease_expires_at")
+    op.drop_column("ingestion_jobs", "attempts")
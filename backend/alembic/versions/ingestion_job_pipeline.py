@@ -0,0 +1,27 @@
+"""Record which ingestion pipeline runs each job
+
+Revision ID: ingestion_job_pipeline
+Revises: embedding_chunk_index
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ingestion_job_pipeline"
+down_revision = "embedding_chunk_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every job queued so far ran the FAISS-directory pipeline
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("pipeline", sa.String(20), nullable=False, server_default="legacy"),
+    )
+
+
+def downgrade():
+    op.drop_column("ingestion_jobs", "pipeline")
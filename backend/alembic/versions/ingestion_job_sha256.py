@@ -0,0 +1,25 @@
+"""Record the SHA-256 of uploaded content on ingestion jobs
+
+Revision ID: ingestion_job_sha256
+Revises: ingestion_jobs
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ingestion_job_sha256"
+down_revision = "ingestion_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ingestion_jobs", sa.Column("content_sha256", sa.String(64), nullable=True))
+    op.create_index("ix_ingestion_jobs_content_sha256", "ingestion_jobs", ["content_sha256"])
+
+
+def downgrade():
+    op.drop_index("ix_ingestion_jobs_content_sha256", table_name="ingestion_jobs")
+    op.drop_column("ingestion_jobs", "content_sha256")
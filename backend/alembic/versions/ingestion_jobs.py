@@ -0,0 +1,42 @@
+"""Add ingestion_jobs table for background document ingestion
+
+Revision ID: ingestion_jobs
+Revises: float32_embeddings
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ingestion_jobs"
+down_revision = "float32_embeddings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("owner_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("file_path", sa.String(512), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="queued"),
+        sa.Column("stage", sa.String(20), nullable=False, server_default="queued"),
+        sa.Column("progress", sa.Float, nullable=False, server_default="0"),
+        sa.Column("document_id", sa.Integer, sa.ForeignKey("documents.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_ingestion_jobs_id", "ingestion_jobs", ["id"])
+    op.create_index("ix_ingestion_jobs_owner_id", "ingestion_jobs", ["owner_id"])
+    op.create_index("ix_ingestion_jobs_status", "ingestion_jobs", ["status"])
+
+
+def downgrade():
+    op.drop_index("ix_ingestion_jobs_status", table_name="ingestion_jobs")
+    op.drop_index("ix_ingestion_jobs_owner_id", table_name="ingestion_jobs")
+    op.drop_index("ix_ingestion_jobs_id", table_name="ingestion_jobs")
+    op.drop_table("ingestion_jobs")
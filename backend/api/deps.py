@@ -0,0 +1,29 @@
+"""
+Shared FastAPI dependencies.
+"""
+from typing import Optional
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from db.session import get_db
+from db.repositories.document import DocumentRepository
+from db.repositories.document_summary import DocumentSummaryRepository
+from db.repositories.embedding import EmbeddingRepository
+from services.providers import ProviderRegistry, get_providers
+from services.rag import RAGService
+
+def build_rag_service(db: AsyncSession, providers: Optional[ProviderRegistry] = None) -> RAGService:
+    """RAG service bound to ``db`` and the shared providers."""
+    return RAGService(
+        document_repository=DocumentRepository(db),
+        embedding_repository=EmbeddingRepository(db),
+        summary_repository=DocumentSummaryRepository(db),
+        providers=providers
+    )
+
+def get_rag_service(
+    db: Session = Depends(get_db),
+    providers: ProviderRegistry = Depends(get_providers)
+) -> RAGService:
+    """RAG service bound to the request's session and the shared providers."""
+    return build_rag_service(db, providers)
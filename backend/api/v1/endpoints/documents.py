@@ -4,47 +4,62 @@ Document API endpoints.
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
-from core.exceptions import DocumentProcessingError
+from core.exceptions import DocumentProcessingError, FileTooLargeError, handle_exception
 from db.session import get_db
+from db.repositories.ingestion_job import IngestionJobRepository
 from schemas.document import DocumentCreate, DocumentResponse, DocumentList
+from schemas.ingestion_job import IngestionJobResponse
+from services.doc_ingestor import save_upload
 from services.document import DocumentService
+from services.answer_cache import get_answer_cache
+from services.ingestion_jobs import get_ingestion_queue
 from services.rag import RAGService
-from api.deps import get_current_user
+from services.vector_index import get_vector_namespaces
+from utils.concurrency import run_blocking
+from api.deps import get_current_user, get_rag_service
 
 router = APIRouter()
 
-@router.post("/upload", response_model=DocumentResponse)
+@router.post("/upload", response_model=IngestionJobResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Upload and process a document."""
+    """Upload a document and queue it for background processing."""
     try:
         # Validate file
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
-        # Read file content
-        content = await file.read()
-        
-        # Create document service
-        document_service = DocumentService()
-        
-        # Process document
-        document = await document_service.process_file(
-            db=db,
-            file=file,
-            content=content,
-            user_id=current_user.id
+        # Stream file to disk and hand it to the ingestion workers
+        upload = await save_upload(file)
+        return await get_ingestion_queue().submit(
+            owner_id=current_user.id,
+            filename=file.filename,
+            file_path=upload.path,
+            content_sha256=upload.sha256
         )
-        
-        return document
-    except DocumentProcessingError as e:
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise handle_exception(e)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Get the status and current stage of an ingestion job."""
+    job = await IngestionJobRepository(db).get(job_id)
+    if not job or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: int,
@@ -99,6 +114,8 @@ async def delete_document(
             document_id=document_id,
             user_id=current_user.id
         )
+        await get_vector_namespaces().remove_document(current_user.id, document_id)
+        await run_blocking(get_answer_cache().invalidate, current_user.id, document_id)
         return {"message": "Document deleted successfully"}
     except DocumentProcessingError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -108,16 +125,14 @@ async def delete_document(
 @router.post("/{document_id}/summarize")
 async def summarize_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    rag_service: RAGService = Depends(get_rag_service),
     current_user = Depends(get_current_user)
 ):
     """Generate a summary for a document."""
     try:
-        rag_service = RAGService()
         summary = await rag_service.generate_summary(
-            db=db,
             document_id=document_id,
-            user_id=current_user.id
+            owner_id=current_user.id
         )
         return {"summary": summary}
     except DocumentProcessingError as e:
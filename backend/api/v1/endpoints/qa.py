@@ -0,0 +1,70 @@
+"""
+Question answering API endpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request
+from core.exceptions import QuestionAnsweringError, handle_exception
+from schemas.qa import QuestionRequest, RAGAnswerResponse
+from services.embedding_cache import normalize_question
+from db.session import AsyncSessionLocal
+from services.single_flight import get_single_flight
+from utils.sse import sse_response, wants_event_stream
+from api.deps import build_rag_service, get_current_user
+
+router = APIRouter()
+
+@router.post("/", response_model=RAGAnswerResponse)
+async def ask_question(
+    payload: QuestionRequest,
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    """
+    Answer a question using the RAG pipeline.
+
+    Set `stream` (or send `Accept: text/event-stream`) to receive the sources,
+    the answer tokens and a final confidence/timing event as Server-Sent Events.
+
+    Set `mode` to `extractive` to get the best matching sentences from the
+    retrieved chunks instead of a generated answer. Extractive answers do not
+    call the LLM and are always returned as JSON.
+    """
+    try:
+        # Identical questions in the same scope share one pipeline run;
+        # runs are never shared across owners. A shared run opens its own
+        # session: the request that started it may go away before it ends
+        flights = get_single_flight()
+        key = (
+            current_user.id,
+            normalize_question(payload.question),
+            payload.document_id,
+            payload.top_k,
+            payload.mode
+        )
+        if payload.mode == "generative" and (payload.stream or wants_event_stream(request.headers.get("accept"))):
+            async def stream():
+                async with AsyncSessionLocal() as session:
+                    async for event in build_rag_service(session).stream_answer(
+                        payload.question,
+                        owner_id=current_user.id,
+                        document_id=payload.document_id,
+                        top_k=payload.top_k
+                    ):
+                        yield event
+
+            return await sse_response(flights.stream(("rag-stream", *key), stream))
+
+        async def answer():
+            async with AsyncSessionLocal() as session:
+                return await build_rag_service(session).answer_question(
+                    payload.question,
+                    owner_id=current_user.id,
+                    document_id=payload.document_id,
+                    top_k=payload.top_k,
+                    mode=payload.mode
+                )
+
+        return await flights.do(("rag", *key), answer)
+    except QuestionAnsweringError as e:
+        raise handle_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
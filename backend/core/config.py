@@ -30,17 +30,68 @@ class Settings(BaseSettings):
     # Vector Store
     VECTOR_STORE_TYPE: str = os.getenv("VECTOR_STORE_TYPE", "faiss")
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./vector_store")
+    # RAM budget for loaded per-owner indexes, per index cache; the least
+    # recently used owners are evicted to disk beyond it
+    VECTOR_INDEX_MEMORY_MB: int = int(os.getenv("VECTOR_INDEX_MEMORY_MB", "1024"))
+    FAISS_INDEX_PATH: str = os.getenv("FAISS_INDEX_PATH", "faiss_index")
+    INDEX_RELOAD_INTERVAL: float = float(os.getenv("INDEX_RELOAD_INTERVAL", "5"))
+    # Cosine similarity a chunk needs to be used as context. When no chunk
+    # reaches it, the question is answered as not found without calling the
+    # LLM. Tuned for text-embedding-ada-002; text-embedding-3 scores run lower.
+    RETRIEVAL_MIN_SIMILARITY: float = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.7"))
+    # Generated answers retrieve this many times top_k candidates above the
+    # floor and let the context packer fill CONTEXT_MAX_TOKENS from them
+    RETRIEVAL_OVERFETCH: int = int(os.getenv("RETRIEVAL_OVERFETCH", "4"))
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     OPENAI_API_BASE: str = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    # "langchain" (shared QA chain) or "native" (direct chat completion)
+    QA_PIPELINE: str = os.getenv("QA_PIPELINE", "langchain")
+    # Sentences returned by mode=extractive
+    EXTRACTIVE_MAX_SPANS: int = int(os.getenv("EXTRACTIVE_MAX_SPANS", "3"))
+    
+    # Outbound HTTP (pooled keep-alive connections to the model provider)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "60"))
+    # Threads for blocking work left in async paths (FAISS, parsing, file I/O)
+    BLOCKING_WORKERS: int = int(os.getenv("BLOCKING_WORKERS", "32"))
+    
+    # Embedding Batching
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "50000"))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    EMBEDDING_CONCURRENCY: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    QUERY_EMBEDDING_BATCH_WINDOW_MS: float = float(os.getenv("QUERY_EMBEDDING_BATCH_WINDOW_MS", "5"))
+    QUERY_EMBEDDING_BATCH_SIZE: int = int(os.getenv("QUERY_EMBEDDING_BATCH_SIZE", "64"))
     
     # Document Processing
     MAX_DOCUMENT_SIZE: int = int(os.getenv("MAX_DOCUMENT_SIZE", "10485760"))  # 10MB
     ALLOWED_EXTENSIONS: set = set(os.getenv("ALLOWED_EXTENSIONS", "pdf,txt,doc,docx").split(","))
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    # Unit for CHUNK_SIZE/CHUNK_OVERLAP: "chars" or "tokens"
+    CHUNK_SIZE_UNIT: str = os.getenv("CHUNK_SIZE_UNIT", "chars")
+    # Prompt token budget for retrieved context
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    INGESTION_QUEUE_SIZE: int = int(os.getenv("INGESTION_QUEUE_SIZE", "8"))
+    # A running job's lease, renewed while it runs, and how often idle
+    # workers look for queued or abandoned jobs
+    INGESTION_LEASE_SECONDS: float = float(os.getenv("INGESTION_LEASE_SECONDS", "60"))
+    INGESTION_POLL_INTERVAL: float = float(os.getenv("INGESTION_POLL_INTERVAL", "5"))
+    # Legacy FAISS uploads persist after this many chunks or seconds, and at the end
+    INGESTION_FLUSH_CHUNKS: int = int(os.getenv("INGESTION_FLUSH_CHUNKS", "2000"))
+    INGESTION_FLUSH_INTERVAL: float = float(os.getenv("INGESTION_FLUSH_INTERVAL", "30"))
+    PDF_PARSE_WORKERS: int = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 2)))
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+    
+    # Summarization
+    SUMMARY_CONCURRENCY: int = int(os.getenv("SUMMARY_CONCURRENCY", "8"))
+    SUMMARY_MAX_CONTEXT_TOKENS: int = int(os.getenv("SUMMARY_MAX_CONTEXT_TOKENS", "3000"))
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -50,6 +101,17 @@ class Settings(BaseSettings):
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD")
     
+    # Caching ("memory" or "redis" for the shared tier)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_SHARED_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SHARED_SIZE", "100000"))
+    EMBEDDING_CACHE_TTL: int = int(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+    SENTENCE_EMBEDDING_CACHE_SIZE: int = int(os.getenv("SENTENCE_EMBEDDING_CACHE_SIZE", "50000"))
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))  # per scope
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
     
@@ -44,6 +44,11 @@ class DocumentProcessingError(BaseError):
     def __init__(self, message: str = "Document processing error", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status.HTTP_500_INTERNAL_SERVER_ERROR, details)
 
+class FileTooLargeError(BaseError):
+    """Raised when an upload exceeds the maximum document size"""
+    def __init__(self, message: str = "File too large", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, details)
+
 class QuestionAnsweringError(BaseError):
     """Raised when question answering fails"""
     def __init__(self, message: str = "Question answering error", details: Optional[Dict[str, Any]] = None):
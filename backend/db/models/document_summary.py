@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+class DocumentSummary(Base):
+    __tablename__ = "document_summaries"
+
+    # SHA-256 of the document content, so identical content shares a summary
+    content_sha256 = Column(String(64), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,14 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, ARRAY, Float
+from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from db.base_class import Base
+from db.types import Float32Vector
 
 class Embedding(Base):
     __tablename__ = "embeddings"
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"))
-    embedding = Column(ARRAY(Float), nullable=False)
+    embedding = Column(Float32Vector, nullable=False)
     content = Column(String, nullable=False)
+    # Position of the chunk within its document, used to merge neighbours
+    chunk_index = Column(Integer, nullable=False, default=0)
 
     # Relationships
     document = relationship("Document", back_populates="embeddings") 
\ No newline at end of file
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(32), primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    # documents: database embeddings served by /api/v1/qa
+    # legacy: per-owner FAISS directory served by /qa
+    pipeline = Column(String(20), nullable=False, default="documents")
+    # queued -> running -> completed | failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    # queued -> parsing -> embedding -> indexing -> completed | failed
+    stage = Column(String(20), nullable=False, default="queued")
+    progress = Column(Float, nullable=False, default=0.0)
+    # Claims so far; above 1 means an earlier attempt was interrupted
+    attempts = Column(Integer, nullable=False, default=0)
+    # Renewed by the worker running the job; once it lapses the job is
+    # considered abandoned and may be claimed again
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
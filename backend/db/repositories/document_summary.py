@@ -0,0 +1,27 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from db.models.document_summary import DocumentSummary
+from db.repositories.base import BaseRepository
+
+class DocumentSummaryRepository(BaseRepository[DocumentSummary]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, DocumentSummary)
+
+    async def get(self, content_sha256: str, model: str) -> Optional[DocumentSummary]:
+        """Get the cached summary for a content hash and model."""
+        return await self.session.get(DocumentSummary, (content_sha256, model))
+
+    async def save(self, content_sha256: str, model: str, summary: str) -> None:
+        """Store a summary, replacing any existing one for the same key."""
+        query = insert(DocumentSummary).values(
+            content_sha256=content_sha256,
+            model=model,
+            summary=summary
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[DocumentSummary.content_sha256, DocumentSummary.model],
+            set_={"summary": query.excluded.summary}
+        )
+        await self.session.execute(query)
+        await self.session.commit()
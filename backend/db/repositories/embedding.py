@@ -1,9 +1,14 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import column, select, insert, delete, table, type_coerce, LargeBinary
 from db.models.embedding import Embedding
+from db.types import FLOAT32_LE
 from db.repositories.base import BaseRepository
 
+# Just the columns needed to scope embeddings to their documents' owner
+documents = table("documents", column("id"), column("owner_id"))
+
 class EmbeddingRepository(BaseRepository[Embedding]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, Embedding)
@@ -25,23 +30,97 @@ class EmbeddingRepository(BaseRepository[Embedding]):
         await self.session.refresh(embedding_obj)
         return embedding_obj
 
+    async def create_many(
+        self,
+        document_id: int,
+        contents: Sequence[str],
+        embeddings: Sequence[List[float]],
+        chunk_indexes: Optional[Sequence[int]] = None
+    ) -> List[int]:
+        """Bulk-insert a document's embeddings in one transaction and return their ids."""
+        if not contents:
+            return []
+        if chunk_indexes is None:
+            chunk_indexes = range(len(contents))
+        rows = [
+            {
+                "document_id": document_id,
+                "embedding": embedding,
+                "content": content,
+                "chunk_index": chunk_index
+            }
+            for content, embedding, chunk_index in zip(contents, embeddings, chunk_indexes)
+        ]
+        # Executed as batched multi-row INSERT ... RETURNING, ids in input order
+        query = insert(Embedding).returning(Embedding.id, sort_by_parameter_order=True)
+        try:
+            result = await self.session.execute(query, rows)
+            ids = list(result.scalars().all())
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return ids
+
     async def get_by_document(self, document_id: int) -> List[Embedding]:
         """Get all embeddings for a document."""
         query = select(Embedding).where(Embedding.document_id == document_id)
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def get_by_ids(self, ids: List[int]) -> List[Embedding]:
+        """Get embeddings by primary key, preserving the order of ``ids``."""
+        query = select(Embedding).where(Embedding.id.in_(ids))
+        result = await self.session.execute(query)
+        by_id = {embedding.id: embedding for embedding in result.scalars().all()}
+        return [by_id[id] for id in ids if id in by_id]
+
     async def get_all(self) -> List[Embedding]:
         """Get all embeddings."""
         query = select(Embedding)
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def get_vectors(
+        self,
+        document_id: Optional[int] = None,
+        owner_id: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Load embeddings as arrays without building ORM objects.
+
+        Returns ``(ids, document_ids, matrix)`` where ``matrix`` is an
+        ``(n, dim)`` float32 array decoded straight from the stored bytes.
+        Optionally restricted to one document or to one owner's documents.
+        """
+        query = select(
+            Embedding.id,
+            Embedding.document_id,
+            type_coerce(Embedding.embedding, LargeBinary)
+        ).order_by(Embedding.id)
+        if document_id is not None:
+            query = query.where(Embedding.document_id == document_id)
+        if owner_id is not None:
+            query = query.join(documents, documents.c.id == Embedding.document_id).where(
+                documents.c.owner_id == owner_id
+            )
+        rows = (await self.session.execute(query)).all()
+        if not rows:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty((0, 0), dtype=np.float32)
+            )
+        ids, document_ids, blobs = zip(*rows)
+        matrix = np.frombuffer(b"".join(blobs), dtype=FLOAT32_LE).reshape(len(blobs), -1)
+        return (
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(document_ids, dtype=np.int64),
+            matrix
+        )
+
     async def delete_by_document(self, document_id: int) -> None:
-        """Delete all embeddings for a document."""
-        query = select(Embedding).where(Embedding.document_id == document_id)
-        result = await self.session.execute(query)
-        embeddings = result.scalars().all()
-        for embedding in embeddings:
-            await self.session.delete(embedding)
+        """Delete all embeddings for a document with a single statement."""
+        query = delete(Embedding).where(Embedding.document_id == document_id)
+        await self.session.execute(query)
         await self.session.commit() 
\ No newline at end of file
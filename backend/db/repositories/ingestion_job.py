@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, update
+from db.models.ingestion_job import IngestionJob
+from db.repositories.base import BaseRepository
+
+class IngestionJobRepository(BaseRepository[IngestionJob]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, IngestionJob)
+
+    async def create(
+        self,
+        owner_id: int,
+        filename: str,
+        file_path: str,
+        content_sha256: Optional[str] = None,
+        pipeline: str = "documents"
+    ) -> IngestionJob:
+        """Create a queued ingestion job."""
+        job = IngestionJob(
+            id=uuid4().hex,
+            owner_id=owner_id,
+            filename=filename,
+            file_path=file_path,
+            content_sha256=content_sha256,
+            pipeline=pipeline,
+            status="queued",
+            stage="queued",
+            attempts=0,
+            progress=0.0
+        )
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by id."""
+        return await self.session.get(IngestionJob, job_id)
+
+    @staticmethod
+    def _claimable(now: datetime):
+        # Queued, or running in a worker that stopped renewing its lease
+        return or_(
+            IngestionJob.status == "queued",
+            and_(
+                IngestionJob.status == "running",
+                or_(IngestionJob.lease_expires_at.is_(None), IngestionJob.lease_expires_at < now)
+            )
+        )
+
+    async def get_claimable(self, limit: int) -> List[str]:
+        """Get the ids of up to ``limit`` jobs a worker could claim, oldest first."""
+        query = (
+            select(IngestionJob.id)
+            .where(self._claimable(datetime.now(timezone.utc)))
+            .order_by(IngestionJob.created_at)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def claim(self, job_id: str, lease_seconds: float) -> Optional[IngestionJob]:
+        """
+        Atomically take a claimable job and lease it for ``lease_seconds``.
+
+        Returns the job, or None if it is finished or another worker holds it.
+        """
+        now = datetime.now(timezone.utc)
+        query = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, self._claimable(now))
+            .values(
+                status="running",
+                attempts=IngestionJob.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=lease_seconds)
+            )
+            .returning(IngestionJob)
+            # The session may already hold this job; load the claimed row over it
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        job = (await self.session.execute(query)).scalars().first()
+        await self.session.commit()
+        return job
+
+    async def renew(self, job_id: str, lease_seconds: float) -> None:
+        """Extend the lease on a running job."""
+        await self.update(
+            job_id,
+            lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        )
+
+    async def update(self, job_id: str, **values: Any) -> None:
+        """Update job columns with a single statement."""
+        query = update(IngestionJob).where(IngestionJob.id == job_id).values(**values)
+        await self.session.execute(query)
+        await self.session.commit()
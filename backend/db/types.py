@@ -0,0 +1,30 @@
+"""
+Custom SQLAlchemy column types.
+"""
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Little-endian float32, independent of the host byte order
+FLOAT32_LE = np.dtype("<f4")
+
+
+class Float32Vector(TypeDecorator):
+    """
+    Embedding vector stored as contiguous little-endian float32 bytes.
+
+    Half the size of ``ARRAY(Float)`` (double precision) and loaded as a
+    NumPy array view over the raw bytes instead of a list of Python floats.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=FLOAT32_LE).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=FLOAT32_LE)
@@ -4,13 +4,24 @@ Includes routers for authentication, document management, and Q&A.
 Initializes the database and loads middleware.
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from core.config import get_settings
 from api.v1 import auth, documents, qa
 from db.session import init_db
+from services.vector_index import get_vector_namespaces
+from services.qa_engine import get_index_namespaces
+from services.ingestion_jobs import get_ingestion_queue
+from services.pdf_extract import shutdown_pdf_pool
+from services.providers import get_providers
+from utils.concurrency import get_blocking_executor
+from services.answer_cache import get_answer_cache
+from services.embedding_cache import get_query_embedding_cache, get_sentence_embedding_cache
+from services.single_flight import get_single_flight
 from middleware.auth_middleware import AuthMiddleware
+from middleware.upload_limit import UploadSizeLimitMiddleware
 
 settings = get_settings()
 
@@ -20,6 +31,10 @@ app = FastAPI(
     description="Upload documents, index them using embeddings, and ask questions via RAG pipeline"
 )
 
+# Reject oversized uploads before their body is read (inside CORS, so the
+# 413 still carries CORS headers)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS config
 app.add_middleware(
     CORSMiddleware,
@@ -42,11 +57,49 @@ async def on_startup():
     """Run DB setup logic and startup tasks"""
     await init_db()
 
+    # Bound every to_thread/run_in_executor call in this worker
+    asyncio.get_running_loop().set_default_executor(get_blocking_executor())
+
+    # Build shared provider clients and chains before serving requests
+    get_providers()
+
+    # Per-owner indexes load on their owner's first query; watch the loaded
+    # Q&A FAISS indexes for new versions
+    app.state.index_watcher = asyncio.create_task(
+        get_index_namespaces().watch(settings.INDEX_RELOAD_INTERVAL)
+    )
+
+    # Start ingestion workers, resuming jobs interrupted by a restart
+    await get_ingestion_queue().start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background tasks"""
+    app.state.index_watcher.cancel()
+    await get_ingestion_queue().stop()
+    shutdown_pdf_pool()
+    # Snapshot changed namespaces so the next start does not rebuild them
+    await get_vector_namespaces().flush()
+    await get_providers().aclose()
+
 @app.get("/", tags=["Health Check"])
 async def root():
     """Health check endpoint"""
     return {"message": f"{settings.PROJECT_NAME} is running."}
 
+@app.get("/metrics", tags=["Health Check"])
+async def metrics():
+    """Cache and batching counters"""
+    return {
+        "query_embedding_cache": get_query_embedding_cache().stats(),
+        "sentence_embedding_cache": get_sentence_embedding_cache().stats(),
+        "query_embedding_batcher": get_providers().query_batcher.stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "single_flight": get_single_flight().stats(),
+        "vector_namespaces": get_vector_namespaces().stats(),
+        "qa_index_namespaces": get_index_namespaces().stats()
+    }
+
 # ✅ Inject BearerAuth into Swagger docs
 def custom_openapi():
     if app.openapi_schema:
@@ -0,0 +1,90 @@
+"""
+ASGI middleware that rejects oversized uploads before their body is received.
+
+FastAPI reads and spools the whole multipart body before an upload endpoint
+runs, so a size check in the handler only fires once the client has sent
+everything. This middleware answers 413 straight away when Content-Length
+is too large, and stops reading a body sent without one as soon as it
+passes the limit.
+"""
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import get_settings
+
+settings = get_settings()
+
+# Room for the multipart boundaries and part headers around the file;
+# save_upload still enforces the limit on the file bytes exactly
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_size: int = settings.MAX_DOCUMENT_SIZE,
+        path_suffix: str = "/upload"
+    ):
+        self.app = app
+        self.max_size = max_size
+        self.max_body = max_size + MULTIPART_OVERHEAD
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].rstrip("/").endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        # Declared size: reject without reading a byte of the body
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body:
+            await self._reject(scope, receive, send)
+            return
+
+        # Chunked (or understated) bodies: count as they arrive
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # Drop whatever error the app made of the aborted body
+            if exceeded and not started:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={
+                "detail": {
+                    "message": "File exceeds maximum document size",
+                    "details": {"max_size": self.max_size}
+                }
+            }
+        )
+        await response(scope, receive, send)
@@ -3,19 +3,18 @@ Router to handle document uploads and management.
 """
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request, status
-from services.doc_ingestor import save_and_ingest_file
+from core.exceptions import FileTooLargeError, handle_exception
+from db.repositories.ingestion_job import IngestionJobRepository
+from db.session import AsyncSessionLocal
+from schemas.ingestion_job import IngestionJobResponse
+from services.doc_ingestor import save_upload
+from services.ingestion_jobs import get_ingestion_queue
 
 router = APIRouter()
 
 
-@router.post("/upload")
-async def upload_document(request: Request, file: UploadFile = File(...)):
-    """
-    Upload a document, generate embeddings, and store metadata for the authenticated user.
-
-    - Requires: Bearer token in Authorization header
-    - File types supported: .pdf, .txt
-    """
+def get_request_user(request: Request) -> dict:
+    """Return the authenticated user from request.state or raise 401."""
     # Safely get user from request.state
     user = getattr(request.state, "user", None)
 
@@ -25,15 +24,50 @@ async def upload_document(request: Request, file: UploadFile = File(...)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized: Missing or invalid token"
         )
+    return user
 
-    # Call document ingestion service
-    success = await save_and_ingest_file(file, user["id"])
 
-    # If ingestion failed
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Upload failed during ingestion"
-        )
+@router.post(
+    "/upload",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=IngestionJobResponse
+)
+async def upload_document(request: Request, file: UploadFile = File(...)):
+    """
+    Upload a document and queue it for embedding and indexing.
+
+    - Requires: Bearer token in Authorization header
+    - File types supported: .pdf, .txt
+    - Returns the ingestion job; poll `/documents/jobs/{job_id}` for progress
+    """
+    user = get_request_user(request)
+
+    try:
+        upload = await save_upload(file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileTooLargeError as e:
+        raise handle_exception(e)
+
+    return await get_ingestion_queue().submit(
+        owner_id=user["id"],
+        filename=file.filename,
+        file_path=upload.path,
+        content_sha256=upload.sha256,
+        pipeline="legacy"
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: str, request: Request):
+    """
+    Report the status and current stage of an ingestion job.
+    """
+    user = get_request_user(request)
+
+    async with AsyncSessionLocal() as session:
+        job = await IngestionJobRepository(session).get(job_id)
 
-    return {"message": "Document uploaded and indexed successfully"}
+    if not job or job.owner_id != user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Body, HTTPException
-from services.qa_engine import get_answer
+from fastapi import APIRouter, Body, HTTPException, Request
+from services.embedding_cache import normalize_question
+from services.qa_engine import get_answer, get_extractive_answer, stream_answer
+from services.single_flight import get_single_flight
+from utils.sse import sse_response, wants_event_stream
+from routers.documents import get_request_user
 
 router = APIRouter()
 
 
 @router.post("/")
-async def qa_endpoint(payload: dict = Body(...)):
+async def qa_endpoint(request: Request, payload: dict = Body(...)):
+    # Questions are answered from the caller's own index only
+    owner_id = get_request_user(request)["id"]
     question = payload.get("question")
     if not question:
         raise HTTPException(status_code=400, detail="Missing question field")
+    # Identical questions asked at the same time by the same owner share one
+    # retrieval + LLM run
+    flights = get_single_flight()
+    key = (owner_id, normalize_question(question))
     try:
-        answer = await get_answer(question)
+        # Extractive answers skip the LLM and are cheap enough to return as JSON
+        if payload.get("mode") == "extractive":
+            return await flights.do(
+                ("qa-extractive", *key), lambda: get_extractive_answer(question, owner_id)
+            )
+        # Streaming is opt-in; plain JSON clients keep the {"answer": ...} contract
+        if payload.get("stream") or wants_event_stream(request.headers.get("accept")):
+            return await sse_response(
+                flights.stream(("qa-stream", *key), lambda: stream_answer(question, owner_id))
+            )
+        answer = await flights.do(("qa", *key), lambda: get_answer(question, owner_id))
         return {"answer": answer}
     except Exception as e:
         raise HTTPException(
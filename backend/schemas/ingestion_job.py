@@ -0,0 +1,23 @@
+"""
+Schema definitions for background ingestion jobs.
+"""
+
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    filename: str
+    content_sha256: Optional[str] = None
+    status: str
+    stage: str
+    progress: float
+    document_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
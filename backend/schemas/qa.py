@@ -2,12 +2,39 @@
 Pydantic schema for question and answer exchange.
 """
 
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 
 class QuestionRequest(BaseModel):
     question: str
+    document_id: Optional[int] = None
+    top_k: int = 3
+    # Stream the answer as Server-Sent Events instead of a JSON body
+    stream: bool = False
+    # "extractive" returns the best matching sentences without calling the LLM
+    mode: Literal["generative", "extractive"] = "generative"
 
 
 class AnswerResponse(BaseModel):
     answer: str
+
+
+class SourceResponse(BaseModel):
+    document_id: str
+    chunk_index: int
+
+
+class SpanResponse(BaseModel):
+    text: str
+    score: float
+    document_id: str
+    chunk_index: int
+
+
+class RAGAnswerResponse(BaseModel):
+    answer: str
+    confidence: float
+    sources: List[SourceResponse]
+    # Only set in extractive mode
+    spans: Optional[List[SpanResponse]] = None
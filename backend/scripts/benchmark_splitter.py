@@ -0,0 +1,123 @@
+"""
+Compare LangChain's RecursiveCharacterTextSplitter with LinearTextSplitter.
+
+Reports throughput in MB/s and how similar the chunks are, for character
+and token sizes. The corpus is every PDF/TXT file under the given paths
+(default: uploads/), optionally repeated to reach a minimum size.
+
+    python scripts/benchmark_splitter.py [paths ...] [--min-mb 20] [--repeat 3]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from core.config import get_settings
+from services.embedding_batcher import get_encoding
+from utils.text_splitter import LinearTextSplitter
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def load_corpus(paths, min_mb):
+    """Concatenate the text of every PDF/TXT file found under ``paths``."""
+    texts = []
+    for root in map(Path, paths):
+        files = [root] if root.is_file() else sorted(root.rglob("*"))
+        for path in files:
+            if path.suffix.lower() == ".pdf":
+                texts.extend(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+            elif path.suffix.lower() == ".txt":
+                texts.append(path.read_text(errors="ignore"))
+    text = "\n\n".join(texts)
+    if not text:
+        raise SystemExit("No PDF or TXT files found")
+    min_chars = int(min_mb * 1_000_000)
+    if len(text) < min_chars:
+        text = "\n\n".join([text] * (min_chars // len(text) + 1))
+    return text
+
+
+def benchmark(splitter, text, repeat):
+    """Best-of-``repeat`` throughput in MB/s, plus the chunks."""
+    mb = len(text.encode("utf-8")) / 1_000_000
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = splitter.split_text(text)
+        best = min(best, time.perf_counter() - started)
+    return mb / best, chunks
+
+
+def similarity(reference, candidate):
+    """Share of candidate chunks that the reference splitter also produced."""
+    reference = set(reference)
+    return sum(chunk in reference for chunk in candidate) / len(candidate)
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=[str(Path(__file__).parent.parent / "uploads")])
+    parser.add_argument("--min-mb", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=settings.CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=settings.CHUNK_OVERLAP)
+    parser.add_argument("--token-chunk-size", type=int, default=256)
+    parser.add_argument("--token-chunk-overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    text = load_corpus(args.paths, args.min_mb)
+    encoding = get_encoding(settings.EMBEDDING_MODEL)
+    print(f"Corpus: {len(text.encode('utf-8')) / 1_000_000:.1f} MB")
+
+    cases = {
+        "chars": (
+            RecursiveCharacterTextSplitter(
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+                separators=SEPARATORS
+            ),
+            LinearTextSplitter(
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+                separators=SEPARATORS
+            ),
+        ),
+        "tokens": (
+            RecursiveCharacterTextSplitter(
+                chunk_size=args.token_chunk_size,
+                chunk_overlap=args.token_chunk_overlap,
+                separators=SEPARATORS,
+                length_function=lambda t: len(encoding.encode_ordinary(t))
+            ),
+            LinearTextSplitter(
+                chunk_size=args.token_chunk_size,
+                chunk_overlap=args.token_chunk_overlap,
+                separators=SEPARATORS,
+                encoding=encoding
+            ),
+        ),
+    }
+
+    print(f"{'unit':<8}{'splitter':<12}{'MB/s':>10}{'chunks':>10}{'mean len':>10}{'same':>8}")
+    for unit, (recursive, linear) in cases.items():
+        reference = None
+        for name, splitter in (("recursive", recursive), ("linear", linear)):
+            throughput, chunks = benchmark(splitter, text, args.repeat)
+            reference = reference or chunks
+            print(
+                f"{unit:<8}{name:<12}{throughput:>10.2f}{len(chunks):>10}"
+                f"{statistics.mean(map(len, chunks)):>10.0f}{similarity(reference, chunks):>8.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
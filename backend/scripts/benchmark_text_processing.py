@@ -0,0 +1,66 @@
+"""
+Measure text cleaning and metadata extraction against the rest of ingest.
+
+Reports MB/s for clean_text, clean_texts (per page, batched), extract_metadata,
+the configured text splitter and chunk token counting, on the same corpus
+as benchmark_splitter.py. Cleaning should be well ahead of splitting.
+
+    python scripts/benchmark_text_processing.py [paths ...] [--min-mb 20] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmark_splitter import load_corpus
+from core.config import get_settings
+from services.embedding_batcher import get_encoding
+from utils.text_processing import PAGE_BREAK, clean_text, clean_texts, extract_metadata
+from utils.text_splitter import LinearTextSplitter
+
+
+def throughput(fn, size, repeat):
+    """Best-of-``repeat`` MB/s for ``fn()`` over ``size`` bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return size / 1_000_000 / best
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=[str(Path(__file__).parent.parent / "uploads")])
+    parser.add_argument("--min-mb", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = load_corpus(args.paths, args.min_mb)
+    size = len(text.encode("utf-8"))
+    # Roughly page-sized pieces, as the ingestion pipeline sees them
+    pages = [text[i:i + 3000] for i in range(0, len(text), 3000)]
+    cleaned = clean_text(text)
+    encoding = get_encoding(settings.EMBEDDING_MODEL)
+    splitter = LinearTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    chunks = splitter.split_text(cleaned)
+    print(f"Corpus: {size / 1_000_000:.1f} MB, {len(pages)} pages, {len(chunks)} chunks")
+
+    stages = {
+        "clean_text": lambda: clean_text(text),
+        "clean_text per page": lambda: [clean_text(page) for page in pages],
+        "clean_texts batched": lambda: clean_texts(pages),
+        "extract_metadata": lambda: extract_metadata(PAGE_BREAK.join(pages)),
+        "split": lambda: splitter.split_text(cleaned),
+        "count tokens": lambda: encoding.encode_ordinary_batch(chunks),
+    }
+    for name, fn in stages.items():
+        print(f"{name:<22}{throughput(fn, size, args.repeat):>10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
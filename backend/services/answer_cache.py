@@ -0,0 +1,188 @@
+"""
+Semantic answer cache: reuse an answer when a new question is a near-duplicate.
+
+Entries are grouped by scope (the asking owner, the document a question is
+restricted to or all of the owner's documents, plus ``top_k``). A lookup compares the normalized question
+embedding against every entry in its scope with one matrix product and
+returns the best answer above the similarity threshold. Any change to a
+document drops the scopes that could have retrieved from it.
+
+Entries live in each worker process, so invalidation is also shared: every
+change bumps the owner's generation counter in the embedding cache's shared
+backend (Redis in production). Answers are stamped with the generation read
+before they were computed, and a lookup only serves answers stamped with the
+current one, so a document changed in one worker is never answered from
+another worker's stale entries.
+"""
+import copy
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import get_settings
+from services.embedding_cache import get_shared_backend
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Scope = Tuple[int, Optional[int], int]
+# This process's invalidation counter and the owner's shared generation
+Epoch = Tuple[int, int]
+
+
+class _ScopeEntries:
+    """Unit-length question vectors and their answers, oldest first."""
+
+    def __init__(self, dimension: int):
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.answers: List[Dict[str, Any]] = []
+        self.expires_at: List[float] = []
+        self.generations: List[int] = []
+
+
+class SemanticAnswerCache:
+    """Thread-safe cache of answers keyed by question-embedding similarity."""
+
+    def __init__(self, threshold: float, max_entries: int, ttl: float, shared=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Holds the per-owner generations; None keeps invalidation local
+        self.shared = shared
+        self._scopes: Dict[Scope, _ScopeEntries] = {}
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    @staticmethod
+    def _generation_key(owner_id: int) -> str:
+        return f"answers:gen:{owner_id}"
+
+    def epoch(self, owner_id: int) -> Optional[Epoch]:
+        """
+        Read before computing an answer and pass it to ``lookup`` and ``store``.
+
+        May do network I/O. None if the shared generation can't be read, in
+        which case the cache is bypassed.
+        """
+        generation = 0
+        if self.shared is not None:
+            try:
+                generation = int(self.shared.get(self._generation_key(owner_id)) or 0)
+            except Exception:
+                logger.warning("Shared answer cache generation unavailable", exc_info=True)
+                return None
+        return self._epoch, generation
+
+    def lookup(
+        self,
+        vector,
+        owner_id: int,
+        document_id: Optional[int],
+        top_k: int,
+        epoch: Optional[Epoch]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest current answer within the threshold."""
+        query = self._normalize(vector)
+        with self._lock:
+            entries = self._scopes.get((owner_id, document_id, top_k))
+            if (
+                epoch is not None
+                and entries is not None
+                and entries.answers
+                and entries.vectors.shape[1] == query.shape[0]
+            ):
+                scores = entries.vectors @ query
+                scores[np.asarray(entries.expires_at) <= time.monotonic()] = -np.inf
+                # Answered before another worker's invalidation
+                scores[np.asarray(entries.generations) != epoch[1]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return copy.deepcopy(entries.answers[best])
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        vector,
+        owner_id: int,
+        document_id: Optional[int],
+        top_k: int,
+        answer: Dict[str, Any],
+        epoch: Optional[Epoch]
+    ) -> None:
+        """
+        Cache ``answer`` unless a document changed since ``epoch`` was read.
+
+        The check keeps an answer computed from a stale index from being
+        cached after the invalidation that should have removed it. Changes
+        made by other workers are caught by the generation stamp instead.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            if epoch is None or epoch[0] != self._epoch:
+                return
+            scope = (owner_id, document_id, top_k)
+            entries = self._scopes.get(scope)
+            if entries is None or entries.vectors.shape[1] != query.shape[0]:
+                entries = self._scopes[scope] = _ScopeEntries(query.shape[0])
+            entries.vectors = np.vstack([entries.vectors, query])[-self.max_entries:]
+            entries.answers = (entries.answers + [copy.deepcopy(answer)])[-self.max_entries:]
+            entries.expires_at = (entries.expires_at + [time.monotonic() + self.ttl])[-self.max_entries:]
+            entries.generations = (entries.generations + [epoch[1]])[-self.max_entries:]
+
+    def invalidate(self, owner_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """
+        Drop answers that may depend on ``owner_id``'s ``document_id``.
+
+        That is the document's own scope plus the owner's unrestricted
+        scopes. Without ``document_id`` all of the owner's answers go;
+        without ``owner_id`` everything in this process does. Other workers
+        drop all of the owner's answers. May do network I/O.
+        """
+        with self._lock:
+            self._epoch += 1
+            for scope in list(self._scopes):
+                if owner_id is None or (
+                    scope[0] == owner_id and (document_id is None or scope[1] in (None, document_id))
+                ):
+                    del self._scopes[scope]
+        if owner_id is not None and self.shared is not None:
+            try:
+                # Outlives every answer stamped with the previous generation
+                self.shared.incr(self._generation_key(owner_id), int(self.ttl) + 1)
+            except Exception:
+                logger.warning("Shared answer cache generation unavailable", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(e.answers) for e in self._scopes.values()),
+                "scopes": len(self._scopes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache()
+def get_answer_cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(
+        threshold=settings.ANSWER_CACHE_THRESHOLD,
+        max_entries=settings.ANSWER_CACHE_SIZE,
+        ttl=settings.ANSWER_CACHE_TTL,
+        shared=get_shared_backend()
+    )
@@ -0,0 +1,102 @@
+"""
+Token-budgeted assembly of retrieved chunks into prompt context.
+
+Chunks are cut with an overlap, so neighbouring chunks of the same document
+repeat text. The packer selects chunks in relevance order until a token
+budget is spent, charging a chunk only for the text its already selected
+predecessor does not cover. It then merges runs of consecutive chunks into
+one passage with the repeated overlap removed.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import tiktoken
+from langchain.schema import Document
+
+from core.config import get_settings
+from services.embedding_batcher import get_encoding
+
+settings = get_settings()
+
+# Shorter suffix/prefix matches are treated as coincidence, not overlap
+MIN_OVERLAP = 8
+
+
+def overlap_length(previous: str, text: str, max_overlap: int) -> int:
+    """Length of the longest prefix of ``text`` that repeats the end of ``previous``."""
+    for size in range(min(len(previous), len(text), max_overlap), MIN_OVERLAP - 1, -1):
+        if previous.endswith(text[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """Selects and merges retrieved chunks under a prompt token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = settings.CONTEXT_MAX_TOKENS,
+        max_overlap: int = settings.CHUNK_OVERLAP,
+        encoding: Optional[tiktoken.Encoding] = None
+    ):
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+        self.encoding = encoding or get_encoding(settings.OPENAI_MODEL)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def pack(self, chunks: Sequence[Document]) -> Tuple[List[Document], List[Document]]:
+        """
+        Pack ``chunks`` (most relevant first) into the budget.
+
+        Chunk metadata must carry ``source`` and ``chunk_index``. Returns the
+        selected chunks in relevance order (for citing sources) and the merged
+        passages to put in the prompt, ordered by their best chunk.
+        """
+        selected: Dict[Tuple[str, int], Document] = {}
+        used = 0
+        for chunk in chunks:
+            key = (chunk.metadata["source"], chunk.metadata["chunk_index"])
+            if key in selected:
+                continue
+            previous = selected.get((key[0], key[1] - 1))
+            text = chunk.page_content
+            if previous is not None:
+                text = text[overlap_length(previous.page_content, text, self.max_overlap):]
+            cost = self.count_tokens(text)
+            if used + cost > self.max_tokens:
+                if selected:
+                    # Keep looking: a smaller chunk further down may still fit
+                    continue
+                # Never send an empty context; trim the best chunk instead
+                tokens = self.encoding.encode_ordinary(chunk.page_content)[:self.max_tokens]
+                chunk = Document(page_content=self.encoding.decode(tokens), metadata=chunk.metadata)
+                cost = len(tokens)
+            selected[key] = chunk
+            used += cost
+        return list(selected.values()), self._merge(list(selected.values()))
+
+    def _merge(self, selected: List[Document]) -> List[Document]:
+        """Join runs of consecutive chunks from the same document."""
+        rank = {id(chunk): i for i, chunk in enumerate(selected)}
+        ordered = sorted(selected, key=lambda c: (c.metadata["source"], c.metadata["chunk_index"]))
+        passages: List[Tuple[int, Document]] = []
+        run: List[Document] = []
+        for chunk in ordered + [None]:
+            if run and (
+                chunk is None
+                or chunk.metadata["source"] != run[-1].metadata["source"]
+                or chunk.metadata["chunk_index"] != run[-1].metadata["chunk_index"] + 1
+            ):
+                text = run[0].page_content
+                for previous, current in zip(run, run[1:]):
+                    size = overlap_length(previous.page_content, current.page_content, self.max_overlap)
+                    text += current.page_content[size:] if size else "\n" + current.page_content
+                passages.append((
+                    min(rank[id(c)] for c in run),
+                    Document(page_content=text, metadata=dict(run[0].metadata))
+                ))
+                run = []
+            if chunk is not None:
+                run.append(chunk)
+        return [passage for _, passage in sorted(passages, key=lambda p: p[0])]
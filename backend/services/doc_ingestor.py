@@ -1,52 +1,158 @@
 """
 Handles document ingestion and embedding generation.
 """
+import asyncio
+import hashlib
+import logging
 import os
-import shutil
-import traceback
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+import time
+from typing import Iterator, NamedTuple, Optional
+from uuid import uuid4
+from langchain.schema import Document as LangchainDocument
+from langchain_community.document_loaders import TextLoader
 from db.models import Document
 from db.init_db import AsyncSessionLocal
-from core.settings import settings
+from core.config import get_settings
+from core.exceptions import FileTooLargeError
+from services.embedding_batcher import BatchEmbedder
+from services.faiss_store import FaissIndexWriter, remove_tagged
+from services.ingestion_pipeline import IngestionPipeline, StageCallback
+from services.pdf_extract import iter_pdf_pages
+from services.providers import get_providers
+from services.qa_engine import get_index_namespaces
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+SUPPORTED_EXTENSIONS = {".pdf", ".txt"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+async def save_upload(file, max_size: int = settings.MAX_DOCUMENT_SIZE) -> SavedUpload:
+    """
+    Stream an uploaded file to disk under a unique name.
 
-async def save_and_ingest_file(file, user_id: int) -> bool:
+    The file is copied in fixed-size chunks with writes offloaded to a thread,
+    so memory stays constant and the event loop is never blocked. The
+    SHA-256 is computed in the same pass. By the time this runs the request
+    body has already been received; ``UploadSizeLimitMiddleware`` rejects
+    oversized requests before that, and the exact file size is checked here.
+    """
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file format: {ext}")
+
+    filename = os.path.basename(file.filename)
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid4().hex}_{filename}")
+    digest = hashlib.sha256()
+    size = 0
     try:
-        # Save file to disk
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
         with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        # Determine loader based on file extension
-        ext = os.path.splitext(file.filename)[1].lower()
-        if ext == ".pdf":
-            loader = PyPDFLoader(file_path)
-        elif ext == ".txt":
-            loader = TextLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {ext}")
-
-        # Load and embed
-        documents = loader.load()
-        embeddings = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
-        vector_store = FAISS.from_documents(documents, embeddings)
-        vector_store.save_local("faiss_index")
-
-        # Save metadata to DB
-        async with AsyncSessionLocal() as session:
-            doc = Document(title=file.filename,
-                           file_path=file_path, owner_id=user_id)
-            session.add(doc)
-            await session.commit()
-
-        return True
-
-    except Exception as e:
-        print(f"Error during ingestion: {e}")
-        traceback.print_exc()
-        return False
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(
+                        "File exceeds maximum document size",
+                        details={"max_size": max_size}
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return SavedUpload(path=file_path, size=size, sha256=digest.hexdigest())
+
+
+def iter_file_pages(file_path: str, filename: str) -> Iterator[LangchainDocument]:
+    """Yield the pages of a saved upload, lazily and in order."""
+    # Determine page source based on file extension; PDFs are extracted
+    # in the process pool so parsing never holds the API worker's GIL
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".pdf":
+        return iter_pdf_pages(file_path)
+    if ext == ".txt":
+        return TextLoader(file_path).lazy_load()
+    raise ValueError(f"Unsupported file format: {ext}")
+
+
+async def ingest_file(
+    file_path: str,
+    filename: str,
+    user_id: int,
+    on_stage: Optional[StageCallback] = None,
+    job_id: Optional[str] = None,
+    resume: bool = False
+) -> int:
+    """
+    Parse, embed and index a saved upload into the owner's legacy FAISS
+    directory, served by the ``/qa`` router. Returns the new document id.
+
+    Chunks are tagged with ``job_id``; with ``resume`` the chunks an
+    interrupted run of the same job already wrote are removed first.
+    """
+    pages = iter_file_pages(file_path, filename)
+
+    providers = get_providers()
+    embeddings = providers.embeddings
+    # Uploads only ever go to their owner's index
+    namespaces = get_index_namespaces()
+    path = namespaces.path(user_id)
+    if resume and job_id:
+        await asyncio.to_thread(remove_tagged, path, "job_id", job_id, embeddings)
+
+    writer = FaissIndexWriter(path, embeddings)
+    last_flush = time.monotonic()
+
+    async def store(batch, vectors) -> None:
+        nonlocal last_flush
+        for doc in batch:
+            # The upload's own name, shown to clients instead of the path
+            doc.metadata["filename"] = filename
+            if job_id:
+                doc.metadata["job_id"] = job_id
+        writer.add(batch, vectors)
+        # Persisting rewrites the owner's whole index, so it happens on a
+        # cadence; the index watcher makes each flush searchable
+        if (
+            writer.pending >= settings.INGESTION_FLUSH_CHUNKS
+            or time.monotonic() - last_flush >= settings.INGESTION_FLUSH_INTERVAL
+        ):
+            await asyncio.to_thread(writer.flush)
+            last_flush = time.monotonic()
+
+    pipeline = IngestionPipeline(
+        text_splitter=providers.text_splitter,
+        embedder=BatchEmbedder(embeddings),
+        store=store,
+        on_stage=on_stage
+    )
+    try:
+        await pipeline.run(pages)
+        await asyncio.to_thread(writer.flush)
+    except Exception:
+        # Don't leave a failed upload half-indexed
+        if job_id:
+            await asyncio.to_thread(remove_tagged, path, "job_id", job_id, embeddings)
+        raise
+    if writer.version is not None:
+        # The writer is done with the store, so it can be served as is
+        namespaces.publish(user_id, writer.store, writer.version)
+
+    # Save metadata to DB
+    async with AsyncSessionLocal() as session:
+        doc = Document(title=filename,
+                       file_path=file_path, owner_id=user_id)
+        session.add(doc)
+        await session.commit()
+        return doc.id
+
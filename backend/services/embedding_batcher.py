@@ -0,0 +1,69 @@
+"""
+Token budgets for batched, concurrent embedding generation.
+"""
+from functools import lru_cache
+from typing import Iterator, Sequence
+
+import tiktoken
+from langchain.embeddings.base import Embeddings
+
+from core.config import get_settings
+
+settings = get_settings()
+
+
+@lru_cache()
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Return the tokenizer used by ``model_name``."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def batch_by_tokens(
+    token_counts: Sequence[int],
+    max_tokens: int,
+    max_items: int
+) -> Iterator[range]:
+    """
+    Group consecutive items into batches under a token and item budget.
+
+    Yields ranges of indices into ``token_counts``. An item larger than
+    ``max_tokens`` on its own gets a batch to itself.
+    """
+    start, tokens = 0, 0
+    for i, count in enumerate(token_counts):
+        if i > start and (tokens + count > max_tokens or i - start >= max_items):
+            yield range(start, i)
+            start, tokens = i, 0
+        tokens += count
+    if start < len(token_counts):
+        yield range(start, len(token_counts))
+
+
+class BatchEmbedder:
+    """
+    Embedding client plus the budgets ingestion batches are built against.
+
+    The ingestion pipeline groups chunks so that each batch stays under
+    ``max_batch_tokens`` and ``max_batch_size`` and sends up to
+    ``max_concurrency`` of them at once.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = settings.EMBEDDING_BATCH_MAX_TOKENS,
+        max_batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+        max_concurrency: int = settings.EMBEDDING_CONCURRENCY,
+        model_name: str = settings.EMBEDDING_MODEL
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.encoding = get_encoding(model_name)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
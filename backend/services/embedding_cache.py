@@ -0,0 +1,280 @@
+"""
+Two-tier cache in front of query embedding.
+
+Tier one is a bounded in-process LRU. Tier two is shared between workers:
+Redis when ``CACHE_BACKEND=redis`` and the client is installed, otherwise an
+in-memory store with the same interface. Keys are the normalized question
+text plus the embedding model, so trivially different spellings of the same
+question hit the same entry.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from core.config import get_settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+V = TypeVar("V")
+
+
+def normalize_question(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, casefolded, single-spaced."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def encode_vector(vector) -> bytes:
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def decode_vector(data: bytes) -> List[float]:
+    return np.frombuffer(data, dtype="<f4").tolist()
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU bounded by number of entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class MemoryBackend:
+    """Shared-tier fallback: bounded in-memory store with expiry."""
+
+    def __init__(self, max_entries: int):
+        self._cache: LRUCache = LRUCache(max_entries)
+        self._incr_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        return value if expires_at > time.monotonic() else None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._cache.set(key, (value, time.monotonic() + ttl))
+
+    def incr(self, key: str, ttl: int) -> int:
+        with self._incr_lock:
+            value = int(self.get(key) or 0) + 1
+            self.set(key, str(value).encode(), ttl)
+            return value
+
+
+class RedisBackend:
+    """Shared tier backed by Redis."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def incr(self, key: str, ttl: int) -> int:
+        """Atomically increment a counter and restart its expiry."""
+        pipe = self.client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, ttl)
+        value, _ = pipe.execute()
+        return value
+
+
+class QueryEmbeddingCache:
+    """Local LRU over a shared backend, with hit/miss counters."""
+
+    def __init__(self, local_size: int, shared, ttl: int, prefix: str = "qemb"):
+        self.local: LRUCache[List[float]] = LRUCache(local_size)
+        self.shared = shared
+        self.ttl = ttl
+        # Keeps caches that share a backend out of each other's keys
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def key(self, text: str, model: str) -> str:
+        digest = hashlib.sha256(normalize_question(text).encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{model}:{digest}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        vector = self.get_local(key)
+        return vector if vector is not None else self.get_shared(key)
+
+    def get_local(self, key: str) -> Optional[List[float]]:
+        vector = self.local.get(key)
+        if vector is not None:
+            self._count("local_hits")
+        return vector
+
+    def get_shared(self, key: str) -> Optional[List[float]]:
+        """Look up the shared tier (may do network I/O) and promote hits."""
+        try:
+            data = self.shared.get(key)
+        except Exception:
+            logger.warning("Shared embedding cache unavailable", exc_info=True)
+            data = None
+        if data is not None:
+            self._count("shared_hits")
+            vector = decode_vector(data)
+            self.local.set(key, vector)
+            return vector
+        self._count("misses")
+        return None
+
+    def set(self, key: str, vector: List[float]) -> None:
+        self.local.set(key, vector)
+        try:
+            self.shared.set(key, encode_vector(vector), self.ttl)
+        except Exception:
+            logger.warning("Shared embedding cache unavailable", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        hits = self.local_hits + self.shared_hits
+        return {
+            "backend": type(self.shared).__name__,
+            "local_entries": len(self.local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from the cache."""
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache, model: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Cached like queries; only the misses go upstream, in one batch."""
+        keys = [self.cache.key(text, self.model) for text in texts]
+        vectors = [self.cache.get_local(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            shared = await asyncio.to_thread(self._get_shared_many, [keys[i] for i in missing])
+            for i, vector in zip(missing, shared):
+                vectors[i] = vector
+            missing = [i for i in missing if vectors[i] is None]
+        if missing:
+            embedded = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            await asyncio.to_thread(self._set_many, [keys[i] for i in missing], embedded)
+        return [list(vector) for vector in vectors]
+
+    def _get_shared_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        return [self.cache.get_shared(key) for key in keys]
+
+    def _set_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        for key, vector in zip(keys, vectors):
+            self.cache.set(key, vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache.key(text, self.model)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.set(key, vector)
+        return list(vector)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache.key(text, self.model)
+        vector = self.cache.get_local(key)
+        if vector is None:
+            # Keep blocking shared-tier I/O off the event loop
+            vector = await asyncio.to_thread(self.cache.get_shared, key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self.cache.set, key, vector)
+        return list(vector)
+
+
+@lru_cache()
+def get_shared_backend():
+    """The store shared between workers, also used by the answer cache."""
+    if settings.CACHE_BACKEND == "redis" and redis is not None:
+        return RedisBackend(redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD
+        ))
+    if settings.CACHE_BACKEND == "redis":
+        logger.warning("CACHE_BACKEND=redis but the redis package is not installed")
+    return MemoryBackend(settings.EMBEDDING_CACHE_SHARED_SIZE)
+
+
+@lru_cache()
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    return QueryEmbeddingCache(
+        local_size=settings.EMBEDDING_CACHE_SIZE,
+        shared=get_shared_backend(),
+        ttl=settings.EMBEDDING_CACHE_TTL
+    )
+
+
+@lru_cache()
+def get_sentence_embedding_cache() -> QueryEmbeddingCache:
+    """
+    Sentence vectors for extractive answers, kept apart from question
+    vectors so they neither evict them nor skew the query hit rate.
+    """
+    shared = get_shared_backend()
+    if isinstance(shared, MemoryBackend):
+        # The in-memory shared tier is bounded; give sentences their own
+        shared = MemoryBackend(settings.SENTENCE_EMBEDDING_CACHE_SIZE)
+    return QueryEmbeddingCache(
+        local_size=settings.SENTENCE_EMBEDDING_CACHE_SIZE,
+        shared=shared,
+        ttl=settings.EMBEDDING_CACHE_TTL,
+        prefix="semb"
+    )
@@ -0,0 +1,71 @@
+"""
+LLM-free answers: the retrieved sentences closest to the question.
+
+Retrieved chunks are split into sentences and every sentence is scored
+against the question embedding with one NumPy matrix product. Sentence
+vectors come through a cached embeddings wrapper with a cache separate from
+the question cache, so a chunk's sentences cost one batched embedding call
+the first time they are retrieved and nothing afterwards, without evicting
+question vectors.
+"""
+import re
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+
+from core.config import get_settings
+
+settings = get_settings()
+
+# Break after sentence punctuation (keeping a closing quote/bracket) or at line breaks
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+|\n+")
+# Fragments shorter than this (headings, list markers) make poor answers
+MIN_SENTENCE_CHARS = 20
+
+
+class Span(NamedTuple):
+    text: str
+    score: float
+    document: Document
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split ``text`` into sentences, dropping fragments."""
+    return [
+        sentence
+        for sentence in (part.strip() for part in _SENTENCE_BREAK.split(text))
+        if len(sentence) >= MIN_SENTENCE_CHARS
+    ]
+
+
+class SentenceExtractor:
+    """Scores the sentences of retrieved chunks against a question."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    async def extract(
+        self,
+        query_vector: Sequence[float],
+        documents: Sequence[Document],
+        max_spans: int = settings.EXTRACTIVE_MAX_SPANS
+    ) -> List[Span]:
+        """Return up to ``max_spans`` sentences from ``documents``, best first."""
+        # Overlapping chunks repeat sentences; keep the first (best ranked) copy
+        sources = {}
+        for document in documents:
+            for sentence in split_sentences(document.page_content):
+                sources.setdefault(sentence, document)
+        if not sources:
+            return []
+        sentences = list(sources)
+
+        matrix = np.asarray(await self.embeddings.aembed_documents(sentences), dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = matrix @ query / np.maximum(norms, 1e-12)
+
+        best = np.argsort(-scores)[:max_spans]
+        return [Span(sentences[i], float(scores[i]), sources[sentences[i]]) for i in best]
@@ -0,0 +1,287 @@
+"""
+On-disk FAISS indexes used by the Q&A engine: shared readers and appending writers.
+
+Each owner has an index directory of their own. An index is loaded on its
+owner's first query and shared by their requests; loaded indexes are kept
+under a RAM budget and the least recently used are dropped. A background
+watcher polls the loaded indexes' version markers and loads new versions off
+the event loop; the swap is a single reference assignment, so in-flight
+queries keep using the store they started with. Uploads append to the index
+under a file lock and persist it with write-then-rename, loading it once per
+upload rather than once per batch.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+from core.exceptions import VectorStoreError
+from services.namespaces import NamespaceLRU
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+VERSION_FILE = "VERSION"
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+LOCK_FILE = ".lock"
+
+
+@contextmanager
+def index_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Cross-process lock on the index directory.
+
+    Writers hold it exclusively for the whole read-modify-write cycle;
+    readers hold it shared while loading so they never see a half-replaced
+    pair of index files.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def estimate_store_bytes(store: FAISS) -> int:
+    """Approximate RAM held by a store: float32 vectors plus document texts."""
+    documents = getattr(store.docstore, "_dict", {})
+    texts = sum(len(doc.page_content) for doc in documents.values())
+    return store.index.ntotal * store.index.d * 4 + texts
+
+
+def read_index_version(path: str) -> Optional[str]:
+    """Return the version marker of the index at ``path``, if any."""
+    try:
+        with open(os.path.join(path, VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # Indexes written before version files existed fall back to mtime
+    try:
+        return str(os.stat(os.path.join(path, INDEX_FILE)).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+class FaissIndexHolder:
+    """Holds the current FAISS store and hot-swaps it when a new version lands."""
+
+    def __init__(self, path: str, embeddings: Embeddings):
+        self.path = path
+        self.embeddings = embeddings
+        self._store: Optional[FAISS] = None
+        self._version: Optional[str] = None
+        self._memory_bytes = 0
+        self._reload_lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated size of the loaded store, measured when it was swapped in."""
+        return self._memory_bytes
+
+    @property
+    def current(self) -> FAISS:
+        """Return the loaded store without touching the disk."""
+        store = self._store
+        if store is None:
+            raise VectorStoreError("FAISS index is not loaded", details={"path": self.path})
+        return store
+
+    def refresh(self) -> bool:
+        """Load the index from disk if its version changed. Returns True on swap."""
+        with self._reload_lock:
+            if read_index_version(self.path) in (None, self._version):
+                return False
+            with index_lock(self.path, shared=True):
+                version = read_index_version(self.path)
+                store = FAISS.load_local(
+                    self.path,
+                    self.embeddings,
+                    allow_dangerous_deserialization=True
+                )
+            self._store, self._version = store, version
+            self._memory_bytes = estimate_store_bytes(store)
+            logger.info("Loaded FAISS index %s (version %s)", self.path, version)
+            return True
+
+    def publish(self, store: FAISS, version: str) -> None:
+        """Swap in an index this process has just written, skipping the reload."""
+        with self._reload_lock:
+            # A slower concurrent upload must not roll back a newer index
+            if self._version is None or int(version) > int(self._version):
+                self._store, self._version = store, version
+                self._memory_bytes = estimate_store_bytes(store)
+
+    async def watch(self, interval: float) -> None:
+        """Poll for new index versions until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Failed to reload FAISS index from %s", self.path)
+
+
+class FaissIndexNamespaces:
+    """Per-owner ``FaissIndexHolder``s, loaded on demand under a RAM budget."""
+
+    def __init__(self, root: str, embeddings: Embeddings, max_bytes: int):
+        self.root = root
+        self.embeddings = embeddings
+        self._resident: NamespaceLRU[FaissIndexHolder] = NamespaceLRU(
+            max_bytes, lambda holder: holder.memory_bytes
+        )
+        self._loads = SingleFlight()
+
+    def path(self, owner_id: int) -> str:
+        return os.path.join(self.root, f"owner-{owner_id}")
+
+    async def current(self, owner_id: int) -> FAISS:
+        """Return the owner's loaded store, loading it (once) if needed."""
+        holder = self._resident.get(owner_id)
+        if holder is None:
+            holder = await self._loads.do(owner_id, lambda: self._load(owner_id))
+        return holder.current
+
+    async def _load(self, owner_id: int) -> FaissIndexHolder:
+        holder = FaissIndexHolder(self.path(owner_id), self.embeddings)
+        await asyncio.to_thread(holder.refresh)
+        # Every version is already on disk, so evicting just drops the reference
+        self._resident.put(owner_id, holder)
+        return holder
+
+    def publish(self, owner_id: int, store: FAISS, version: str) -> None:
+        """Swap a just-written index in if its owner's namespace is loaded."""
+        holder = self._resident.peek(owner_id)
+        if holder is not None:
+            holder.publish(store, version)
+            # The index grew; evicting others just drops their references
+            self._resident.trim(keep=owner_id)
+
+    async def watch(self, interval: float) -> None:
+        """Poll the loaded indexes for new versions until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for _, holder in self._resident.items():
+                try:
+                    await asyncio.to_thread(holder.refresh)
+                except Exception:
+                    logger.exception("Failed to reload FAISS index from %s", holder.path)
+            # New versions written by other processes may be larger
+            self._resident.trim()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._resident.stats()
+
+
+def _save_atomically(store: FAISS, path: str) -> str:
+    """Persist ``store`` with write-then-rename and bump the version marker."""
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=path)
+    try:
+        store.save_local(tmp_dir)
+        for name in (INDEX_FILE, DOCSTORE_FILE):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(path, name))
+        # The version file is written last so readers only reload complete indexes
+        version = str(time.time_ns())
+        version_tmp = os.path.join(tmp_dir, VERSION_FILE)
+        with open(version_tmp, "w") as f:
+            f.write(version)
+        os.replace(version_tmp, os.path.join(path, VERSION_FILE))
+        return version
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class FaissIndexWriter:
+    """
+    Appends one upload's batches to the index at ``path``.
+
+    The index is loaded once per upload and batches are added in memory;
+    ``flush`` persists what has been added so far. Only if another upload
+    wrote in between is the index reloaded from disk, with this upload's
+    earlier batches already in it. The stores ``flush`` returns must not be
+    shared while the writer is still adding to them.
+    """
+
+    def __init__(self, path: str, embeddings: Embeddings):
+        self.path = path
+        self.embeddings = embeddings
+        self._store: Optional[FAISS] = None
+        self._version: Optional[str] = None
+        self._pending: List[Tuple[str, List[float]]] = []
+        self._pending_metadatas: List[Dict[str, Any]] = []
+
+    @property
+    def pending(self) -> int:
+        """Number of chunks added since the last flush."""
+        return len(self._pending)
+
+    @property
+    def store(self) -> Optional[FAISS]:
+        """The store as of the last flush."""
+        return self._store
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    def add(self, documents: List[Document], vectors: List[List[float]]) -> None:
+        self._pending.extend(zip((doc.page_content for doc in documents), vectors))
+        self._pending_metadatas.extend(doc.metadata for doc in documents)
+
+    def flush(self) -> Optional[Tuple[FAISS, str]]:
+        """Persist the pending chunks. Returns the store and its new version."""
+        if not self._pending:
+            return None
+        with index_lock(self.path):
+            on_disk = read_index_version(self.path)
+            if on_disk is None:
+                self._store = FAISS.from_embeddings(
+                    self._pending, self.embeddings, metadatas=self._pending_metadatas
+                )
+            else:
+                if self._store is None or on_disk != self._version:
+                    self._store = FAISS.load_local(
+                        self.path, self.embeddings, allow_dangerous_deserialization=True
+                    )
+                self._store.add_embeddings(self._pending, metadatas=self._pending_metadatas)
+            self._version = _save_atomically(self._store, self.path)
+        logger.info("Appended %d documents to FAISS index %s", len(self._pending), self.path)
+        self._pending, self._pending_metadatas = [], []
+        return self._store, self._version
+
+
+def remove_tagged(path: str, key: str, value: Any, embeddings: Embeddings) -> int:
+    """Delete every chunk whose ``metadata[key] == value`` from the index at ``path``."""
+    with index_lock(path):
+        if read_index_version(path) is None:
+            return 0
+        store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        ids = [
+            docstore_id
+            for docstore_id, doc in store.docstore._dict.items()
+            if doc.metadata.get(key) == value
+        ]
+        if ids:
+            store.delete(ids)
+            _save_atomically(store, path)
+    logger.info("Removed %d chunks with %s=%s from FAISS index %s", len(ids), key, value, path)
+    return len(ids)
+
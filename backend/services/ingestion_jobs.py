@@ -0,0 +1,217 @@
+"""
+Background ingestion: a persistent job table drained by a bounded worker pool.
+
+Upload endpoints save the file, enqueue a job and return immediately; the
+workers run the parse/embed/index pipeline and record each stage so clients
+can poll for progress.
+
+Every server process runs its own queue over the same table, so a job is
+only run by the worker that claims it: the claim is a single conditional
+UPDATE, and the claimer holds a lease it renews while the job runs. Each
+queue polls for queued jobs and for running jobs whose lease lapsed, which
+is how jobs submitted to a busy process, or left behind by a crashed one,
+get picked up.
+
+``documents`` jobs (the v1 API) store chunks and embeddings in the database
+through ``RAGService.process_pages``; ``legacy`` jobs append to the
+owner's FAISS directory used by the ``/qa`` router.
+"""
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Set
+
+from core.config import get_settings
+from db.models.ingestion_job import IngestionJob
+from db.repositories.document import DocumentRepository
+from db.repositories.embedding import EmbeddingRepository
+from db.repositories.ingestion_job import IngestionJobRepository
+from db.session import AsyncSessionLocal
+from services.doc_ingestor import ingest_file, iter_file_pages
+from services.ingestion_pipeline import StageCallback
+from services.rag import RAGService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STAGES = ("queued", "parsing", "embedding", "indexing", "completed")
+
+
+def stage_progress(stage: str) -> float:
+    """Fraction of the pipeline finished once ``stage`` has been entered."""
+    return STAGES.index(stage) / (len(STAGES) - 1)
+
+
+class IngestionJobQueue:
+    """Runs ingestion jobs on a fixed number of asyncio workers."""
+
+    def __init__(
+        self,
+        workers: int = settings.INGESTION_WORKERS,
+        lease_seconds: float = settings.INGESTION_LEASE_SECONDS,
+        poll_interval: float = settings.INGESTION_POLL_INTERVAL
+    ):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        # Only a few ids are buffered; the rest wait in the table
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=2 * workers)
+        self._pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the workers and the poller that feeds them."""
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._poll(), name="ingestion-poller"))
+
+    async def stop(self) -> None:
+        """Cancel the workers; their jobs are reclaimed once the leases lapse."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        owner_id: int,
+        filename: str,
+        file_path: str,
+        content_sha256: Optional[str] = None,
+        pipeline: str = "documents"
+    ) -> IngestionJob:
+        """Record a new job and queue it for processing."""
+        async with AsyncSessionLocal() as session:
+            job = await IngestionJobRepository(session).create(
+                owner_id=owner_id,
+                filename=filename,
+                file_path=file_path,
+                content_sha256=content_sha256,
+                pipeline=pipeline
+            )
+        # A full queue is fine: the poller finds the job in the table
+        self._offer(job.id)
+        return job
+
+    def _offer(self, job_id: str) -> None:
+        if job_id in self._pending or self._queue.full():
+            return
+        self._pending.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _poll(self) -> None:
+        while True:
+            free = self._queue.maxsize - self._queue.qsize()
+            if free > 0:
+                try:
+                    async with AsyncSessionLocal() as session:
+                        job_ids = await IngestionJobRepository(session).get_claimable(free)
+                    for job_id in job_ids:
+                        self._offer(job_id)
+                except Exception:
+                    logger.exception("Polling for ingestion jobs failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Ingestion worker failed on job %s", job_id)
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as session:
+                    await IngestionJobRepository(session).renew(job_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Renewing the lease on ingestion job %s failed", job_id)
+
+    async def _run(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as session:
+            jobs = IngestionJobRepository(session)
+            # None when the job is finished or another worker holds its lease
+            job = await jobs.claim(job_id, self.lease_seconds)
+            if job is None:
+                return
+
+            async def on_stage(stage: str) -> None:
+                await jobs.update(job_id, stage=stage, progress=stage_progress(stage))
+
+            async def on_created(document_id: int) -> None:
+                # Recorded up front so a resumed job re-indexes this document
+                await jobs.update(job_id, document_id=document_id)
+
+            # An earlier attempt was interrupted and may have stored some
+            # of its chunks already; both pipelines replace them
+            resume = job.attempts > 1
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            try:
+                if job.pipeline == "legacy":
+                    document_id = await ingest_file(
+                        job.file_path,
+                        job.filename,
+                        job.owner_id,
+                        on_stage=on_stage,
+                        job_id=job_id,
+                        resume=resume
+                    )
+                else:
+                    document_id = await self._process_document(job, on_stage, on_created)
+            except Exception as e:
+                logger.exception("Ingestion job %s failed", job_id)
+                await jobs.update(
+                    job_id,
+                    status="failed",
+                    stage="failed",
+                    error=str(e),
+                    lease_expires_at=None
+                )
+                return
+            finally:
+                heartbeat.cancel()
+
+            await jobs.update(
+                job_id,
+                status="completed",
+                stage="completed",
+                progress=1.0,
+                document_id=document_id,
+                lease_expires_at=None
+            )
+
+    async def _process_document(
+        self,
+        job: IngestionJob,
+        on_stage: StageCallback,
+        on_created: Callable[[int], Awaitable[None]]
+    ) -> int:
+        """Stream the upload's pages into a stored document, chunks and embeddings."""
+        pages = iter_file_pages(job.file_path, job.filename)
+        # The pipeline writes through its own session; the job's session is
+        # only used for status updates
+        async with AsyncSessionLocal() as session:
+            rag_service = RAGService(
+                document_repository=DocumentRepository(session),
+                embedding_repository=EmbeddingRepository(session)
+            )
+            return await rag_service.process_pages(
+                pages,
+                {"title": job.filename, "file_path": job.file_path},
+                job.owner_id,
+                on_stage=on_stage,
+                document_id=job.document_id,
+                on_created=on_created
+            )
+
+
+@lru_cache()
+def get_ingestion_queue() -> IngestionJobQueue:
+    return IngestionJobQueue()
@@ -0,0 +1,165 @@
+"""
+Streaming ingestion pipeline: parse page -> clean -> split -> embed batch -> store.
+
+Stages run concurrently and are joined by bounded queues, so a slow stage
+applies backpressure to the ones before it. Memory stays proportional to the
+queue sizes rather than the document length, and the first batches are
+stored (and searchable) while later pages are still being parsed.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain.text_splitter import TextSplitter
+
+from core.config import get_settings
+from services.embedding_batcher import BatchEmbedder
+from utils.concurrency import run_blocking
+from utils.text_processing import clean_text
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Persists one embedded batch; called from a single task, in completion order
+StoreCallback = Callable[[List[Document], List[List[float]]], Awaitable[None]]
+# Called with the name of each stage as ingestion enters it; calls never
+# overlap and stages are only reported in order
+StageCallback = Callable[[str], Awaitable[None]]
+# Called with each page's cleaned text, in page order, before it is split
+PageCallback = Callable[[str], Awaitable[None]]
+
+STAGES = ("parsing", "embedding", "indexing")
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """Runs a page iterator through the ingestion stages with backpressure."""
+
+    def __init__(
+        self,
+        text_splitter: TextSplitter,
+        embedder: BatchEmbedder,
+        store: StoreCallback,
+        queue_size: int = settings.INGESTION_QUEUE_SIZE,
+        on_stage: Optional[StageCallback] = None,
+        on_page: Optional[PageCallback] = None
+    ):
+        self.text_splitter = text_splitter
+        self.embedder = embedder
+        self.store = store
+        self.queue_size = queue_size
+        self.on_stage = on_stage
+        self.on_page = on_page
+        self._stage: Optional[str] = None
+        self._stage_lock: Optional[asyncio.Lock] = None
+
+    async def _enter(self, stage: str) -> None:
+        # Stages are entered from different tasks (the parser finishing, the
+        # last embedder finishing) in either order; report them one at a time
+        # and never go back to an earlier one
+        if not self.on_stage:
+            return
+        async with self._stage_lock:
+            if self._stage is not None and STAGES.index(stage) <= STAGES.index(self._stage):
+                return
+            self._stage = stage
+            await self.on_stage(stage)
+
+    async def run(self, pages: Iterator[Document]) -> int:
+        """Ingest ``pages`` and return the number of chunks stored."""
+        self._stage = None
+        self._stage_lock = asyncio.Lock()
+        page_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        batch_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        result_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        embedders = running = self.embedder.max_concurrency
+
+        async def embed() -> None:
+            nonlocal running
+            # Batches are already within budget, so each one is a single request
+            while (batch := await batch_queue.get()) is not _DONE:
+                vectors = await self.embedder.embeddings.aembed_documents(
+                    [doc.page_content for doc in batch]
+                )
+                await result_queue.put((batch, vectors))
+            await result_queue.put(_DONE)
+            running -= 1
+            if not running:
+                await self._enter("indexing")
+
+        store_task = asyncio.create_task(self._store(result_queue, embedders))
+        tasks = [
+            asyncio.create_task(self._parse(pages, page_queue)),
+            asyncio.create_task(self._split(page_queue, batch_queue, embedders)),
+            *(asyncio.create_task(embed()) for _ in range(embedders)),
+            store_task,
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return store_task.result()
+
+    async def _parse(self, pages: Iterator[Document], out: asyncio.Queue) -> None:
+        """Pull pages from the (blocking) iterator off the event loop."""
+        await self._enter("parsing")
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            await out.put(page)
+        await out.put(_DONE)
+        await self._enter("embedding")
+
+    async def _split(self, pages: asyncio.Queue, out: asyncio.Queue, consumers: int) -> None:
+        """Clean and split pages, grouping chunks into token-budgeted batches."""
+        batch: List[Document] = []
+        tokens = 0
+        chunk_index = 0
+        while (page := await pages.get()) is not _DONE:
+            text, chunks = await run_blocking(self._split_page, page)
+            if self.on_page:
+                await self.on_page(text)
+            for chunk, count in chunks:
+                if batch and (
+                    tokens + count > self.embedder.max_batch_tokens
+                    or len(batch) >= self.embedder.max_batch_size
+                ):
+                    await out.put(batch)
+                    batch, tokens = [], 0
+                batch.append(Document(
+                    page_content=chunk,
+                    metadata={**page.metadata, "chunk_index": chunk_index}
+                ))
+                tokens += count
+                chunk_index += 1
+            # Parsing is the bottleneck: ship what we have instead of waiting for more
+            if batch and pages.empty():
+                await out.put(batch)
+                batch, tokens = [], 0
+        if batch:
+            await out.put(batch)
+        for _ in range(consumers):
+            await out.put(_DONE)
+
+    def _split_page(self, page: Document) -> Tuple[str, List[Tuple[str, int]]]:
+        """Clean and split one page; returns the cleaned text and each chunk's token count."""
+        text = clean_text(page.page_content)
+        chunks = self.text_splitter.split_text(text)
+        return text, [(chunk, self.embedder.count_tokens(chunk)) for chunk in chunks]
+
+    async def _store(self, results: asyncio.Queue, producers: int) -> int:
+        """Persist embedded batches one at a time as they arrive."""
+        stored = 0
+        while producers:
+            item: Tuple[List[Document], List[List[float]]] = await results.get()
+            if item is _DONE:
+                producers -= 1
+                continue
+            batch, vectors = item
+            await self.store(batch, vectors)
+            stored += len(batch)
+            logger.debug("Stored %d chunks (%d total)", len(batch), stored)
+        return stored
@@ -0,0 +1,99 @@
+"""
+Memory-budgeted residency for per-owner index namespaces.
+
+Every owner's vectors live in their own index, persisted on its own. Indexes
+are loaded on first use and kept in least-recently-used order; when the
+estimated size of the loaded ones exceeds the RAM budget, the coldest are
+evicted and only come back from disk when their owner queries again.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Charged per resident namespace on top of its own estimate, so that many
+# empty namespaces still count against the budget
+NAMESPACE_OVERHEAD_BYTES = 64 * 1024
+
+
+class NamespaceLRU(Generic[T]):
+    """Thread-safe LRU of loaded namespaces, bounded by estimated bytes."""
+
+    def __init__(self, max_bytes: int, size_of: Callable[[T], int]):
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._entries: "OrderedDict[int, T]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bytes(self) -> int:
+        return sum(self._size_of(value) + NAMESPACE_OVERHEAD_BYTES for value in self._entries.values())
+
+    def get(self, owner_id: int) -> Optional[T]:
+        """Return the loaded namespace and mark it as recently used."""
+        with self._lock:
+            value = self._entries.get(owner_id)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(owner_id)
+            self.hits += 1
+            return value
+
+    def peek(self, owner_id: int) -> Optional[T]:
+        """Return the loaded namespace without touching its recency."""
+        with self._lock:
+            return self._entries.get(owner_id)
+
+    def put(self, owner_id: int, value: T) -> List[Tuple[int, T]]:
+        """
+        Make ``value`` resident and evict the coldest namespaces over budget.
+
+        The namespace just added is never evicted. Returns the evicted
+        ``(owner_id, value)`` pairs so the caller can persist them.
+        """
+        with self._lock:
+            self._entries[owner_id] = value
+            self._entries.move_to_end(owner_id)
+            return self._trim(keep=owner_id)
+
+    def trim(self, keep: Optional[int] = None) -> List[Tuple[int, T]]:
+        """
+        Evict the coldest namespaces until the resident ones fit the budget.
+
+        Call after a resident namespace grew in place; ``keep`` (the one
+        just written to) is never evicted. Returns the evicted pairs.
+        """
+        with self._lock:
+            return self._trim(keep)
+
+    def _trim(self, keep: Optional[int]) -> List[Tuple[int, T]]:
+        evicted = []
+        while self._bytes() > self.max_bytes:
+            victim = next((owner_id for owner_id in self._entries if owner_id != keep), None)
+            if victim is None:
+                break
+            evicted.append((victim, self._entries.pop(victim)))
+            self.evictions += 1
+        return evicted
+
+    def items(self) -> List[Tuple[int, T]]:
+        with self._lock:
+            return list(self._entries.items())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident": len(self._entries),
+                "resident_bytes": self._bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
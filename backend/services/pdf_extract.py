@@ -0,0 +1,89 @@
+"""
+Parallel PDF text extraction in a process pool.
+
+Text extraction is CPU-bound and holds the GIL, so running it in a thread
+still stalls the event loop. Large PDFs are split into page ranges that are
+extracted by worker processes and yielded back in page order.
+"""
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+from pypdf import PdfReader
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        # The server is already multithreaded by now; forking it can copy a
+        # held lock into a worker and deadlock it, so workers start fresh
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context(method)
+        )
+    return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``[start, stop)``. Runs in a worker process."""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    file_path: str,
+    pool: Optional[ProcessPoolExecutor] = None,
+    pages_per_task: int = settings.PDF_PAGES_PER_TASK
+) -> Iterator[Document]:
+    """
+    Yield one Document per page, in order, extracted in parallel.
+
+    At most two ranges per worker are in flight so a slow consumer holds
+    back extraction instead of buffering the whole document.
+    """
+    pool = pool or get_pdf_pool()
+    num_pages = len(PdfReader(file_path).pages)
+    max_in_flight = 2 * settings.PDF_PARSE_WORKERS
+    starts = iter(range(0, num_pages, pages_per_task))
+    in_flight: Deque[Tuple[int, Future]] = deque()
+
+    def submit_next() -> None:
+        start = next(starts, None)
+        if start is not None:
+            stop = min(start + pages_per_task, num_pages)
+            in_flight.append((start, pool.submit(extract_page_range, file_path, start, stop)))
+
+    for _ in range(max_in_flight):
+        submit_next()
+    try:
+        while in_flight:
+            start, future = in_flight.popleft()
+            texts = future.result()
+            submit_next()
+            for offset, text in enumerate(texts):
+                yield Document(
+                    page_content=text,
+                    metadata={"source": file_path, "page": start + offset}
+                )
+    finally:
+        for _, future in in_flight:
+            future.cancel()
@@ -0,0 +1,54 @@
+"""
+Prompt templates shared by the RAG service and the provider registry.
+"""
+from string import Formatter
+from typing import List, Optional, Tuple
+
+QA_PROMPT_TEMPLATE = """
+            Use the following pieces of context to answer the question at the end.
+            If you don't know the answer, just say that you don't know, don't try to make up an answer.
+            Use three sentences maximum and keep the answer concise.
+            
+            Context: {context}
+            
+            Question: {question}
+            
+            Answer: Let me help you with that.
+            """
+
+# Returned instead of calling the LLM when retrieval finds nothing relevant
+NOT_FOUND_ANSWER = "I couldn't find the answer to that in your documents."
+
+CHUNK_SUMMARY_PROMPT = """
+                Summarize the following text concisely in one sentence:
+                
+                {text}
+                """
+
+FINAL_SUMMARY_PROMPT = """
+            Create a concise summary from these points. The summary should be coherent and well-structured:
+            
+            {text}
+            """
+
+
+class CompiledPrompt:
+    """
+    A ``str.format`` template parsed once.
+
+    Rendering is a single join over the pre-split literal parts, with no
+    template parsing or input validation per call.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(template)
+        ]
+        self.input_variables = [field for _, field in self._parts if field]
+
+    def render(self, **values: str) -> str:
+        return "".join(
+            literal + (values[field] if field else "")
+            for literal, field in self._parts
+        )
@@ -0,0 +1,108 @@
+"""
+Long-lived provider clients shared by every request.
+
+The registry is built once at startup. It owns pooled keep-alive HTTP
+clients for the OpenAI API, plus the model wrappers, text splitter and QA
+chains built on top of them. Request handlers get these objects through
+dependencies instead of constructing (and handshaking) their own.
+"""
+from functools import lru_cache
+
+import httpx
+from openai import AsyncOpenAI
+from langchain.chains.question_answering import load_qa_chain
+from langchain.chat_models import ChatOpenAI
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.llms import OpenAI
+from langchain.prompts import PromptTemplate
+
+from core.config import get_settings
+from services.context_packer import ContextPacker
+from services.embedding_batcher import get_encoding
+from services.embedding_cache import CachedEmbeddings, get_query_embedding_cache, get_sentence_embedding_cache
+from services.extractive import SentenceExtractor
+from services.prompts import QA_PROMPT_TEMPLATE, CompiledPrompt
+from services.query_batcher import QueryEmbeddingBatcher
+from utils.text_splitter import LinearTextSplitter
+
+settings = get_settings()
+
+
+class ProviderRegistry:
+    """Shared HTTP clients, models and chains."""
+
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(settings.HTTP_TIMEOUT)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+        clients = {
+            "openai_api_key": settings.OPENAI_API_KEY,
+            "openai_api_base": settings.OPENAI_API_BASE,
+            "http_client": self.http_client,
+            "http_async_client": self.http_async_client,
+        }
+        self.embeddings = OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, **clients)
+        self.llm = ChatOpenAI(model_name=settings.OPENAI_MODEL, temperature=0, **clients)
+        # Completion model used by the legacy /qa engine
+        self.completion_llm = OpenAI(**clients)
+
+        # Question embeddings: cached, then batched across concurrent requests
+        self.query_batcher = QueryEmbeddingBatcher(self.embeddings)
+        self.query_embeddings = CachedEmbeddings(
+            self.query_batcher,
+            get_query_embedding_cache(),
+            settings.EMBEDDING_MODEL
+        )
+
+        chunk_in_tokens = settings.CHUNK_SIZE_UNIT == "tokens"
+        self.text_splitter = LinearTextSplitter(
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            separators=["\n\n", "\n", " ", ""],
+            encoding=get_encoding(settings.EMBEDDING_MODEL) if chunk_in_tokens else None
+        )
+        self.qa_chain = load_qa_chain(
+            self.llm,
+            chain_type="stuff",
+            prompt=PromptTemplate(
+                template=QA_PROMPT_TEMPLATE,
+                input_variables=["context", "question"]
+            )
+        )
+        self.legacy_qa_chain = load_qa_chain(self.completion_llm, chain_type="stuff")
+
+        # Native QA path: one chat completion with a prompt parsed at startup
+        self.openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_API_BASE,
+            http_client=self.http_async_client
+        )
+        self.qa_prompt = CompiledPrompt(QA_PROMPT_TEMPLATE)
+        # The packer looks for overlap in characters; allow for long tokens
+        self.context_packer = ContextPacker(
+            max_overlap=settings.CHUNK_OVERLAP * (8 if chunk_in_tokens else 1)
+        )
+        # Extractive answers: sentence vectors have a cache of their own
+        self.sentence_embeddings = CachedEmbeddings(
+            self.embeddings,
+            get_sentence_embedding_cache(),
+            settings.EMBEDDING_MODEL
+        )
+        self.extractor = SentenceExtractor(self.sentence_embeddings)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+@lru_cache()
+def get_providers() -> ProviderRegistry:
+    """Process-wide registry; also usable as a FastAPI dependency."""
+    return ProviderRegistry()
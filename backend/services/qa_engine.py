@@ -2,31 +2,114 @@
 Service to run the RAG Q&A pipeline using LangChain.
 """
 
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains.question_answering import load_qa_chain
-from langchain.llms import OpenAI
-from core.config import settings  # or from core.settings if that's your file
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List
+from core.config import get_settings
+from services.faiss_store import FaissIndexNamespaces
+from services.prompts import NOT_FOUND_ANSWER
+from services.providers import get_providers
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
-async def get_answer(question: str) -> str:
-    try:
-        print("🔍 Loading FAISS index...")
-        db = FAISS.load_local(
-            "faiss_index",
-            OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY),
-            allow_dangerous_deserialization=True
-        )
 
-        print("Performing similarity search...")
-        docs = db.similarity_search(question, k=4)
+@lru_cache()
+def get_index_namespaces() -> FaissIndexNamespaces:
+    """Per-owner FAISS indexes, loaded on first use and hot-reloaded on new versions."""
+    return FaissIndexNamespaces(
+        settings.FAISS_INDEX_PATH,
+        get_providers().query_embeddings,
+        settings.VECTOR_INDEX_MEMORY_MB * 1024 * 1024
+    )
+
+
+def format_source(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The client-facing part of a chunk's metadata; the stored path and the
+    ingestion job id stay on the server.
+    """
+    filename = metadata.get("filename")
+    if filename is None and "source" in metadata:
+        # Indexed before chunks carried their filename: strip the
+        # directory and the unique prefix added by save_upload
+        filename = os.path.basename(metadata["source"]).split("_", 1)[-1]
+    return {"filename": filename, "page": metadata.get("page")}
+
+
+def format_sources(docs: List[Any]) -> List[Dict[str, Any]]:
+    return [format_source(doc.metadata) for doc in docs]
+
+
+def get_qa_chain():
+    """QA chain built once at startup and reused across requests."""
+    return get_providers().legacy_qa_chain
+
 
-        print("Generating answer...")
-        llm = OpenAI(openai_api_key=settings.OPENAI_API_KEY)
-        chain = load_qa_chain(llm, chain_type="stuff")
+async def get_answer(question: str, owner_id: int) -> str:
+    try:
+        db = await get_index_namespaces().current(owner_id)
+
+        logger.debug("Performing similarity search")
+        docs = await db.asimilarity_search(question, k=4)
 
-        return chain.run(input_documents=docs, question=question)
+        logger.debug("Generating answer")
+        return await get_qa_chain().arun(input_documents=docs, question=question)
 
     except Exception as e:
-        print("Error in RAG pipeline:", str(e))
+        logger.error("Error in RAG pipeline: %s", e)
         return "Error generating answer"
+
+
+async def get_extractive_answer(question: str, owner_id: int) -> Dict[str, Any]:
+    """The owner's indexed sentences closest to the question, without an LLM call."""
+    providers = get_providers()
+    query_vector = await providers.query_embeddings.aembed_query(question)
+    db = await get_index_namespaces().current(owner_id)
+    docs = await db.asimilarity_search_by_vector(query_vector, k=4)
+    spans = await providers.extractor.extract(query_vector, docs)
+    return {
+        "answer": spans[0].text if spans else NOT_FOUND_ANSWER,
+        "spans": [
+            {"text": span.text, "score": span.score, "source": format_source(span.document.metadata)}
+            for span in spans
+        ]
+    }
+
+
+async def stream_answer(question: str, owner_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Answer a question over the owner's index as ``sources``, ``token`` and ``done`` events.
+    """
+    started = time.perf_counter()
+    db = await get_index_namespaces().current(owner_id)
+    results = await db.asimilarity_search_with_relevance_scores(question, k=4)
+    docs = [doc for doc, _ in results]
+    retrieved = time.perf_counter()
+    yield {"event": "sources", "data": format_sources(docs)}
+
+    llm_chain = get_qa_chain().llm_chain
+    prompt = llm_chain.prompt.format(
+        context="\n\n".join(doc.page_content for doc in docs),
+        question=question
+    )
+    first_token = None
+    async for token in llm_chain.llm.astream(prompt):
+        if first_token is None:
+            first_token = time.perf_counter()
+        yield {"event": "token", "data": token}
+
+    finished = time.perf_counter()
+    yield {
+        "event": "done",
+        "data": {
+            "confidence": max((score for _, score in results), default=0.0),
+            "timing": {
+                "retrieval_ms": round((retrieved - started) * 1000, 1),
+                "first_token_ms": round(((first_token or finished) - started) * 1000, 1),
+                "total_ms": round((finished - started) * 1000, 1)
+            }
+        }
+    }
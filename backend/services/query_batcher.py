@@ -0,0 +1,142 @@
+"""
+Cross-request micro-batching of query embeddings.
+
+Each question used to cost one single-item embedding request. The batcher
+holds questions from concurrent requests for at most a short window (or until
+a batch is full), sends them upstream as one ``embed_documents`` call and
+hands each caller its own vector. Callers may be worker threads or
+coroutines; neither blocks the other while waiting.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from langchain.embeddings.base import Embeddings
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_Pending = Tuple[str, "Future[List[float]]", float]
+
+
+class BatchSizeHistogram:
+    """Counts of observed batch sizes in power-of-two buckets."""
+
+    def __init__(self, max_size: int):
+        self.bounds: List[int] = []
+        bound = 1
+        while bound < max_size:
+            self.bounds.append(bound)
+            bound *= 2
+        self.bounds.append(max_size)
+        self.counts = [0] * len(self.bounds)
+        self.total = 0
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def observe(self, size: int) -> None:
+        with self._lock:
+            self.observations += 1
+            self.total += size
+            for i, bound in enumerate(self.bounds):
+                if size <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets": {f"le_{b}": c for b, c in zip(self.bounds, self.counts)},
+                "count": self.observations,
+                "sum": self.total,
+                "mean": self.total / self.observations if self.observations else 0.0,
+            }
+
+
+class QueryEmbeddingBatcher(Embeddings):
+    """Embeddings wrapper that coalesces concurrent ``embed_query`` calls."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = settings.QUERY_EMBEDDING_BATCH_SIZE,
+        max_wait_ms: float = settings.QUERY_EMBEDDING_BATCH_WINDOW_MS,
+        max_concurrency: int = settings.EMBEDDING_CONCURRENCY
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.histogram = BatchSizeHistogram(max_batch_size)
+        self._pending: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="query-embed"
+        )
+        self._flusher = threading.Thread(target=self._collect, name="query-batcher", daemon=True)
+        self._flusher.start()
+
+    def submit(self, text: str) -> "Future[List[float]]":
+        """Queue ``text`` for the next batch and return its future vector."""
+        future: "Future[List[float]]" = Future()
+        with self._cond:
+            self._pending.append((text, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "window_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": pending,
+            "batch_sizes": self.histogram.snapshot(),
+        }
+
+    def _collect(self) -> None:
+        """Cut batches when they fill up or the oldest item's window closes."""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            # Upstream calls run elsewhere so the next batch keeps collecting
+            self._executor.submit(self._embed_batch, batch)
+
+    def _embed_batch(self, batch: List[_Pending]) -> None:
+        self.histogram.observe(len(batch))
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+        except Exception as e:
+            logger.warning("Query embedding batch of %d failed: %s", len(batch), e)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for text, future, _ in batch:
+            future.set_result(list(vectors[text]))
@@ -1,19 +1,24 @@
 """
 RAG (Retrieval-Augmented Generation) service implementation.
 """
-from typing import List, Dict, Any, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate
+import asyncio
+import hashlib
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Iterator
 from langchain.schema import Document
 from core.config import get_settings
 from core.exceptions import DocumentProcessingError, QuestionAnsweringError, VectorStoreError
 from db.repositories.document import DocumentRepository
+from db.repositories.document_summary import DocumentSummaryRepository
 from db.repositories.embedding import EmbeddingRepository
-from utils.text_processing import clean_text, extract_metadata
+from services.answer_cache import SemanticAnswerCache, get_answer_cache
+from services.embedding_batcher import BatchEmbedder, batch_by_tokens, get_encoding
+from services.ingestion_pipeline import IngestionPipeline, StageCallback
+from services.prompts import CHUNK_SUMMARY_PROMPT, FINAL_SUMMARY_PROMPT, NOT_FOUND_ANSWER
+from services.providers import ProviderRegistry, get_providers
+from services.vector_index import VectorNamespaces, get_vector_namespaces
+from utils.concurrency import run_blocking
+from utils.text_processing import PAGE_BREAK, MetadataCollector
 
 settings = get_settings()
 
@@ -21,55 +26,124 @@ class RAGService:
     def __init__(
         self,
         document_repository: DocumentRepository,
-        embedding_repository: EmbeddingRepository
+        embedding_repository: EmbeddingRepository,
+        vector_namespaces: Optional[VectorNamespaces] = None,
+        summary_repository: Optional[DocumentSummaryRepository] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        providers: Optional[ProviderRegistry] = None
     ):
         self.document_repository = document_repository
         self.embedding_repository = embedding_repository
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.OPENAI_API_KEY,
-            openai_api_base=settings.OPENAI_API_BASE
-        )
-        self.llm = ChatOpenAI(
-            model_name=settings.OPENAI_MODEL,
-            temperature=0,
-            openai_api_key=settings.OPENAI_API_KEY,
-            openai_api_base=settings.OPENAI_API_BASE
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+        self.summary_repository = summary_repository
+        self.vector_namespaces = vector_namespaces or get_vector_namespaces()
+        if answer_cache is None and settings.ANSWER_CACHE_ENABLED:
+            answer_cache = get_answer_cache()
+        self.answer_cache = answer_cache
+        
+        # Clients, models and chains are shared; nothing is built per request
+        providers = providers or get_providers()
+        self.embeddings = providers.embeddings
+        self.llm = providers.llm
+        self.qa_chain = providers.qa_chain
+        self.qa_prompt = providers.qa_prompt
+        self.context_packer = providers.context_packer
+        self.openai_client = providers.openai_client
+        self.text_splitter = providers.text_splitter
+        self.query_embeddings = providers.query_embeddings
+        self.extractor = providers.extractor
+        self.batch_embedder = BatchEmbedder(self.embeddings)
+
+    async def process_document(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        owner_id: int,
+        on_stage: Optional[StageCallback] = None,
+        document_id: Optional[int] = None,
+        on_created: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> int:
+        """Process a document held in memory; see ``process_pages``."""
+        return await self.process_pages(
+            iter([Document(page_content=content, metadata=metadata)]),
+            metadata,
+            owner_id,
+            on_stage=on_stage,
+            document_id=document_id,
+            on_created=on_created
         )
 
-    def process_document(self, content: str, metadata: Dict[str, Any]) -> int:
-        """Process a document and store its embeddings."""
+    async def process_pages(
+        self,
+        pages: Iterator[Document],
+        metadata: Dict[str, Any],
+        owner_id: int,
+        on_stage: Optional[StageCallback] = None,
+        document_id: Optional[int] = None,
+        on_created: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Process a document page by page and store its embeddings in its
+        owner's namespace.
+
+        ``pages`` is consumed lazily, off the event loop. Each cleaned page is
+        appended to the stored document as it is split, and the extracted
+        metadata is written once the last page is in, so the full text is
+        never held in memory.
+
+        ``on_created`` is called with the new document's id before any
+        embeddings are stored. Passing that id back as ``document_id``
+        re-indexes the document instead of creating another one: content and
+        embeddings left by an interrupted run are dropped first.
+        """
         try:
-            # Clean and preprocess text
-            cleaned_content = clean_text(content)
-            
-            # Extract metadata
-            extracted_metadata = extract_metadata(cleaned_content)
-            metadata.update(extracted_metadata)
+            if document_id is None:
+                # Store document; its content follows page by page
+                document = await self.document_repository.create(
+                    content="",
+                    metadata=metadata,
+                    owner_id=owner_id
+                )
+                document_id = document.id
+                if on_created:
+                    await on_created(document_id)
+            else:
+                await self.document_repository.update(document_id, content="")
+                await self.embedding_repository.delete_by_document(document_id)
+                await self.vector_namespaces.remove_document(owner_id, document_id)
             
-            # Split document into chunks
-            chunks = self.text_splitter.split_text(cleaned_content)
+            collector = MetadataCollector()
             
-            # Store document
-            document_id = self.document_repository.create(
-                content=cleaned_content,
-                metadata=metadata
-            )
+            async def on_page(text: str) -> None:
+                separator = PAGE_BREAK if collector.page_count else ""
+                collector.add(text)
+                await self.document_repository.append_content(document_id, separator + text)
             
-            # Create and store embeddings for each chunk
-            for i, chunk in enumerate(chunks):
-                embedding = self.embeddings.embed_query(chunk)
-                self.embedding_repository.create(
+            async def store(batch: List[Document], vectors: List[List[float]]) -> None:
+                # One bulk insert per batch, then make the chunks searchable
+                # without rebuilding the index
+                ids = await self.embedding_repository.create_many(
                     document_id=document_id,
-                    content=chunk,
-                    embedding=embedding,
-                    metadata={"chunk_index": i}
+                    contents=[doc.page_content for doc in batch],
+                    embeddings=vectors,
+                    chunk_indexes=[doc.metadata["chunk_index"] for doc in batch]
                 )
+                await self.vector_namespaces.add(owner_id, ids, vectors, document_id)
+            
+            # Split, embed (token-budgeted batches, several in flight) and store
+            pipeline = IngestionPipeline(
+                text_splitter=self.text_splitter,
+                embedder=self.batch_embedder,
+                store=store,
+                on_stage=on_stage,
+                on_page=on_page
+            )
+            await pipeline.run(pages)
+            await self.document_repository.update(
+                document_id,
+                metadata={**metadata, **collector.metadata()}
+            )
+            if self.answer_cache:
+                await run_blocking(self.answer_cache.invalidate, owner_id, document_id)
             
             return document_id
         except Exception as e:
@@ -78,116 +152,235 @@ class RAGService:
                 details={"error": str(e)}
             )
 
-    def answer_question(
+    async def answer_question(
         self,
         question: str,
+        owner_id: int,
         document_id: Optional[int] = None,
-        top_k: int = 3
+        top_k: int = 3,
+        mode: str = "generative"
     ) -> Dict[str, Any]:
-        """Answer a question using RAG."""
+        """
+        Answer a question using RAG over ``owner_id``'s documents.
+
+        In ``extractive`` mode the answer is the retrieved sentence closest to
+        the question, with the best ``spans``; no LLM is called.
+        """
         try:
-            # Get relevant embeddings
-            if document_id:
-                embeddings = self.embedding_repository.get_by_document(document_id)
-            else:
-                embeddings = self.embedding_repository.get_all()
-            
-            if not embeddings:
-                raise QuestionAnsweringError("No relevant documents found")
+            query_vector = await self.query_embeddings.aembed_query(question)
+            # Extractive answers are cheap enough to compute every time
+            answer_cache = self.answer_cache if mode == "generative" else None
             
-            # Create vector store
-            texts = [e.content for e in embeddings]
-            vectors = [e.embedding for e in embeddings]
-            metadatas = [{"source": str(e.document_id), "chunk_index": e.metadata.get("chunk_index", 0)} for e in embeddings]
-            
-            vector_store = FAISS.from_embeddings(
-                text_embeddings=list(zip(texts, vectors)),
-                embedding=self.embeddings,
-                metadatas=metadatas
-            )
+            # Near-duplicate questions in the same scope reuse the stored answer
+            if answer_cache:
+                epoch = await run_blocking(answer_cache.epoch, owner_id)
+                cached = answer_cache.lookup(query_vector, owner_id, document_id, top_k, epoch)
+                if cached is not None:
+                    return cached
             
-            # Create QA chain with custom prompt
-            prompt_template = """
-            Use the following pieces of context to answer the question at the end.
-            If you don't know the answer, just say that you don't know, don't try to make up an answer.
-            Use three sentences maximum and keep the answer concise.
+            # The packer decides how many chunks fit, so give it more to choose from
+            candidates = top_k if mode == "extractive" else top_k * settings.RETRIEVAL_OVERFETCH
+            source_documents = await self._search(query_vector, owner_id, document_id, candidates)
             
-            Context: {context}
-            
-            Question: {question}
-            
-            Answer: Let me help you with that.
-            """
-            
-            prompt = PromptTemplate(
-                template=prompt_template,
-                input_variables=["context", "question"]
+            if not source_documents:
+                # Nothing relevant was retrieved; an LLM call could only guess
+                answer = {"answer": NOT_FOUND_ANSWER, "confidence": 0.0, "sources": []}
+            elif mode == "extractive":
+                answer = await self._extract(query_vector, source_documents)
+            else:
+                # Merge neighbouring chunks and fit them to the prompt token budget
+                source_documents, context = self.context_packer.pack(source_documents)
+                
+                if settings.QA_PIPELINE == "native":
+                    output_text = await self._complete(question, context)
+                else:
+                    # Get answer from the shared QA chain
+                    output = await self.qa_chain.acall({"input_documents": context, "question": question})
+                    output_text = output["output_text"]
+                
+                answer = {
+                    "answer": output_text,
+                    "confidence": self._calculate_confidence(source_documents),
+                    "sources": self._format_sources(source_documents)
+                }
+            if answer_cache:
+                answer_cache.store(query_vector, owner_id, document_id, top_k, answer, epoch)
+            return answer
+        except Exception as e:
+            raise QuestionAnsweringError(
+                "Error answering question",
+                details={"error": str(e)}
             )
-            
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=vector_store.as_retriever(search_kwargs={"k": top_k}),
-                return_source_documents=True,
-                chain_type_kwargs={"prompt": prompt}
+
+    async def stream_answer(
+        self,
+        question: str,
+        owner_id: int,
+        document_id: Optional[int] = None,
+        top_k: int = 3
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question as a stream of events.
+
+        Yields ``sources`` once retrieval is done, then one ``token`` event per
+        generated fragment, then ``done`` with the confidence and timings.
+        """
+        started = time.perf_counter()
+        try:
+            source_documents = await self._retrieve(
+                question, owner_id, document_id, top_k * settings.RETRIEVAL_OVERFETCH
             )
-            
-            # Get answer
-            result = qa_chain({"query": question})
-            
-            # Calculate confidence score
-            confidence = self._calculate_confidence(result)
-            
-            return {
-                "answer": result["result"],
-                "confidence": confidence,
-                "sources": [
-                    {
-                        "document_id": doc.metadata["source"],
-                        "chunk_index": doc.metadata["chunk_index"]
-                    }
-                    for doc in result["source_documents"]
-                ]
-            }
+            if source_documents:
+                source_documents, context = self.context_packer.pack(source_documents)
         except Exception as e:
             raise QuestionAnsweringError(
                 "Error answering question",
                 details={"error": str(e)}
             )
+        retrieved = time.perf_counter()
+        yield {"event": "sources", "data": self._format_sources(source_documents)}
+        
+        first_token = None
+        if not source_documents:
+            yield {"event": "token", "data": NOT_FOUND_ANSWER}
+        else:
+            prompt = self._build_prompt(question, context)
+            async for chunk in self.llm.astream(prompt):
+                if not chunk.content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                yield {"event": "token", "data": chunk.content}
+        
+        finished = time.perf_counter()
+        yield {
+            "event": "done",
+            "data": {
+                "confidence": self._calculate_confidence(source_documents),
+                "timing": {
+                    "retrieval_ms": round((retrieved - started) * 1000, 1),
+                    "first_token_ms": round(((first_token or finished) - started) * 1000, 1),
+                    "total_ms": round((finished - started) * 1000, 1)
+                }
+            }
+        }
+
+    def _build_prompt(self, question: str, context: List[Document]) -> str:
+        """Stuff the packed passages into the compiled QA prompt."""
+        return self.qa_prompt.render(
+            context="\n\n".join(doc.page_content for doc in context),
+            question=question
+        )
+
+    async def _complete(self, question: str, context: List[Document]) -> str:
+        """Answer with a single chat completion, without a LangChain chain."""
+        response = await self.openai_client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            temperature=0,
+            messages=[{"role": "user", "content": self._build_prompt(question, context)}]
+        )
+        return response.choices[0].message.content
+
+    async def _extract(self, query_vector: List[float], source_documents: List[Document]) -> Dict[str, Any]:
+        """Answer with the retrieved sentences most similar to the question."""
+        spans = await self.extractor.extract(query_vector, source_documents)
+        if not spans:
+            return {"answer": NOT_FOUND_ANSWER, "confidence": 0.0, "sources": [], "spans": []}
+        cited = list({id(span.document): span.document for span in spans}.values())
+        return {
+            "answer": spans[0].text,
+            "confidence": self._calculate_confidence(cited),
+            "sources": self._format_sources(cited),
+            "spans": [
+                {"text": span.text, "score": span.score, **self._format_sources([span.document])[0]}
+                for span in spans
+            ]
+        }
+
+    async def _retrieve(
+        self,
+        question: str,
+        owner_id: int,
+        document_id: Optional[int],
+        top_k: int
+    ) -> List[Document]:
+        """Return the relevant chunks most similar to the question."""
+        query_vector = await self.query_embeddings.aembed_query(question)
+        return await self._search(query_vector, owner_id, document_id, top_k)
+
+    async def _search(
+        self,
+        query_vector: List[float],
+        owner_id: int,
+        document_id: Optional[int],
+        top_k: int
+    ) -> List[Document]:
+        """
+        Return the chunks most similar to an embedded question, best first.
+
+        Only ``owner_id``'s namespace is searched. Chunks below ``RETRIEVAL_MIN_SIMILARITY`` are dropped, so the result
+        is empty when nothing relevant was found. Each chunk's cosine
+        similarity is kept in its ``score`` metadata.
+        """
+        # Search the owner's long-lived index; FAISS releases the GIL, so run it off the loop
+        index = await self.vector_namespaces.get(owner_id, self.embedding_repository)
+        hits = await run_blocking(index.search, query_vector, k=top_k, document_id=document_id)
+        scores = {id: score for id, score in hits if score >= settings.RETRIEVAL_MIN_SIMILARITY}
+        if not scores:
+            return []
+        
+        embeddings = await self.embedding_repository.get_by_ids(list(scores))
+        return [
+            Document(
+                page_content=e.content,
+                metadata={
+                    "source": str(e.document_id),
+                    "chunk_index": e.chunk_index,
+                    "score": scores[e.id]
+                }
+            )
+            for e in embeddings
+        ]
+
+    def _format_sources(self, source_documents: List[Document]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "document_id": doc.metadata["source"],
+                "chunk_index": doc.metadata["chunk_index"]
+            }
+            for doc in source_documents
+        ]
 
-    def generate_summary(self, document_id: int) -> str:
-        """Generate a summary of a document."""
+    async def generate_summary(self, document_id: int, owner_id: int) -> str:
+        """Generate a summary of one of ``owner_id``'s documents."""
         try:
-            # Get document
-            document = self.document_repository.get(document_id)
-            if not document:
+            # Get document; other owners' documents are reported as missing
+            document = await self.document_repository.get(document_id)
+            if not document or document.owner_id != owner_id:
                 raise DocumentProcessingError(
                     "Document not found",
                     details={"document_id": document_id}
                 )
             
+            # Identical content is only ever summarized once per model
+            content_sha256 = hashlib.sha256(document.content.encode("utf-8")).hexdigest()
+            if self.summary_repository:
+                cached = await self.summary_repository.get(content_sha256, settings.OPENAI_MODEL)
+                if cached:
+                    return cached.summary
+            
             # Split into chunks
-            chunks = self.text_splitter.split_text(document.content)
+            chunks = await run_blocking(self.text_splitter.split_text, document.content)
             
-            # Summarize each chunk
-            summaries = []
-            for chunk in chunks:
-                prompt = f"""
-                Summarize the following text concisely in one sentence:
-                
-                {chunk}
-                """
-                response = self.llm.predict(prompt)
-                summaries.append(response)
+            # Summarize each chunk concurrently
+            summaries = await self._predict_many(CHUNK_SUMMARY_PROMPT, chunks)
             
-            # Combine summaries
-            combined_summary = "\n".join(summaries)
-            final_prompt = f"""
-            Create a concise summary from these points. The summary should be coherent and well-structured:
+            # Combine summaries, reducing in rounds until they fit the context
+            combined_summary = await self._reduce_summaries(summaries)
+            final_summary = await self.llm.apredict(FINAL_SUMMARY_PROMPT.format(text=combined_summary))
             
-            {combined_summary}
-            """
-            final_summary = self.llm.predict(final_prompt)
+            if self.summary_repository:
+                await self.summary_repository.save(content_sha256, settings.OPENAI_MODEL, final_summary)
             
             return final_summary
         except Exception as e:
@@ -196,16 +389,43 @@ class RAGService:
                 details={"error": str(e)}
             )
 
-    def _calculate_confidence(self, result: Dict[str, Any]) -> float:
-        """Calculate confidence score for the answer."""
-        # This is a simple implementation. In production, you might want to use
-        # more sophisticated methods like semantic similarity or model confidence scores.
-        source_docs = result.get("source_documents", [])
-        if not source_docs:
-            return 0.0
+    async def _predict_many(self, template: str, texts: List[str]) -> List[str]:
+        """Run one LLM call per text, at most SUMMARY_CONCURRENCY at a time."""
+        semaphore = asyncio.Semaphore(settings.SUMMARY_CONCURRENCY)
         
-        # Calculate confidence based on number of relevant sources
-        num_sources = len(source_docs)
-        max_sources = 3  # Maximum number of sources we expect
+        async def predict(text: str) -> str:
+            async with semaphore:
+                return await self.llm.apredict(template.format(text=text))
         
-        return min(num_sources / max_sources, 1.0) 
\ No newline at end of file
+        return list(await asyncio.gather(*(predict(text) for text in texts)))
+
+    async def _reduce_summaries(self, summaries: List[str]) -> str:
+        """Merge summaries hierarchically until they fit in one prompt."""
+        encoding = get_encoding(settings.OPENAI_MODEL)
+        max_tokens = settings.SUMMARY_MAX_CONTEXT_TOKENS
+        while len(summaries) > 1:
+            token_counts = [len(tokens) for tokens in encoding.encode_ordinary_batch(summaries)]
+            if sum(token_counts) <= max_tokens:
+                break
+            groups = list(batch_by_tokens(token_counts, max_tokens, len(summaries)))
+            if len(groups) == len(summaries):
+                # Every summary fills the budget alone; pair them up to keep shrinking
+                groups = [range(i, min(i + 2, len(summaries))) for i in range(0, len(summaries), 2)]
+            summaries = await self._predict_many(
+                FINAL_SUMMARY_PROMPT,
+                ["\n".join(summaries[i] for i in group) for group in groups]
+            )
+        return "\n".join(summaries)
+
+    def _calculate_confidence(self, source_documents: List[Document]) -> float:
+        """
+        Confidence from retrieval similarity.
+
+        The best source's cosine similarity is rescaled so the relevance
+        floor maps to 0 and an exact match to 1.
+        """
+        if not source_documents:
+            return 0.0
+        best = max(doc.metadata["score"] for doc in source_documents)
+        floor = settings.RETRIEVAL_MIN_SIMILARITY
+        return round(min(max((best - floor) / (1 - floor), 0.0), 1.0), 4) 
\ No newline at end of file
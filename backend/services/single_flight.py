@@ -0,0 +1,131 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+The first caller for a key starts the work; callers that arrive while it is
+still running wait for the same result instead of starting their own. For
+streams, one task consumes the source and every subscriber receives all of
+its events, including the ones emitted before they joined.
+"""
+import asyncio
+import logging
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Broadcast:
+    """Replays one event stream to any number of subscribers."""
+
+    def __init__(self, events: AsyncIterator[Any], on_done: Callable[[], None]):
+        self.events: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._on_done = on_done
+        self.task = asyncio.ensure_future(self._pump(events))
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _pump(self, events: AsyncIterator[Any]) -> None:
+        try:
+            async for event in events:
+                self.events.append(event)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._on_done()
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(self.events):
+                    yield self.events[position]
+                    position += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            # Nobody is listening any more: stop paying for the upstream call
+            if not self.subscribers and not self.done:
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls and streams that share a key."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``fn()``, sharing one run with concurrent callers of ``key``."""
+        future = self._calls.get(key)
+        if future is None:
+            self.started += 1
+            future = self._calls[key] = asyncio.ensure_future(fn())
+            future.add_done_callback(lambda f: self._forget(self._calls, key, f))
+        else:
+            self.coalesced += 1
+        # A caller that goes away must not cancel the run for the others
+        return await asyncio.shield(future)
+
+    def stream(
+        self,
+        key: Hashable,
+        fn: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """Subscribe to ``fn()``'s events, sharing one run per ``key``."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.started += 1
+            broadcast = _Broadcast(fn(), lambda: self._forget(self._streams, key, broadcast))
+            self._streams[key] = broadcast
+        else:
+            self.coalesced += 1
+        return broadcast.subscribe()
+
+    @staticmethod
+    def _forget(flights: Dict[Hashable, Any], key: Hashable, flight: Any) -> None:
+        if flights.get(key) is flight:
+            del flights[key]
+        if isinstance(flight, asyncio.Future) and not flight.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            flight.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+@lru_cache()
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
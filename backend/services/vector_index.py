@@ -0,0 +1,331 @@
+"""
+Long-lived FAISS indexes, one namespace per document owner.
+
+Vectors are stored under their ``embeddings.id`` primary key so search hits
+map straight back to database rows. An owner's index is built once, on their
+first query, and then kept in sync by ingestion and deletion instead of being
+rebuilt per query. Queries only ever touch the caller's own vectors.
+
+Every server process holds its own copies, so each owner also has a
+generation counter on disk, next to the snapshots, that every write bumps.
+A copy remembers the generation it reflects; when another process has
+written since, the copy is reloaded on its next use. Snapshots are stamped
+with their generation and ignored once it is out of date.
+"""
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+
+from core.config import get_settings
+from core.exceptions import VectorStoreError
+from services.namespaces import NamespaceLRU
+from services.single_flight import SingleFlight
+from utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def read_generation(path: str) -> int:
+    """Return the generation counter stored at ``path``; 0 if there is none."""
+    try:
+        with open(path) as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                return int(f.read() or 0)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    except FileNotFoundError:
+        return 0
+
+
+def bump_generation(path: str) -> int:
+    """Increment the generation counter at ``path`` across processes and return it."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            generation = int(f.read() or 0) + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(generation))
+            f.flush()
+            return generation
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class VectorIndexManager:
+    """Thread-safe cosine-similarity index keyed by embedding id."""
+
+    def __init__(self, dimension: Optional[int] = None):
+        self._lock = threading.RLock()
+        self._dimension = dimension
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._ids_by_document: Dict[int, np.ndarray] = {}
+        # Generation stamped on the snapshot this index was read from
+        self.generation: Optional[int] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return 0 if self._index is None else self._index.ntotal
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated RAM: the float32 vectors plus id maps."""
+        with self._lock:
+            if self._index is None:
+                return 0
+            return self._index.ntotal * (self._index.d * 4 + 32)
+
+    def _prepare(self, vectors) -> np.ndarray:
+        """Return a normalized, contiguous float32 copy of ``vectors``."""
+        matrix = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+        if self._dimension is None:
+            self._dimension = matrix.shape[1]
+        if matrix.shape[1] != self._dimension:
+            raise VectorStoreError(
+                "Embedding dimension mismatch",
+                details={"expected": self._dimension, "got": matrix.shape[1]}
+            )
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    def _ensure_index(self) -> faiss.IndexIDMap2:
+        if self._index is None:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self._dimension))
+        return self._index
+
+    def build(
+        self,
+        ids: Sequence[int],
+        vectors,
+        document_ids: Sequence[int]
+    ) -> None:
+        """Replace the whole index with the given rows."""
+        with self._lock:
+            self._index = None
+            self._ids_by_document = {}
+            if len(ids):
+                ids = np.asarray(ids, dtype=np.int64)
+                document_ids = np.asarray(document_ids, dtype=np.int64)
+                matrix = self._prepare(vectors)
+                self._ensure_index().add_with_ids(matrix, ids)
+                for document_id in np.unique(document_ids):
+                    self._ids_by_document[int(document_id)] = ids[document_ids == document_id]
+
+    def add(self, ids: Sequence[int], vectors, document_id: int) -> None:
+        """Add the embeddings of a single document."""
+        if not len(ids):
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            matrix = self._prepare(vectors)
+            self._ensure_index().add_with_ids(matrix, ids)
+            existing = self._ids_by_document.get(document_id)
+            self._ids_by_document[document_id] = (
+                ids if existing is None else np.concatenate([existing, ids])
+            )
+
+    def save(self, path: str, generation: int = 0) -> None:
+        """Write the index, its document mapping and ``generation`` to a single file, atomically."""
+        with self._lock:
+            data = faiss.serialize_index(self._index) if self._index is not None else np.empty(0, dtype=np.uint8)
+            groups = list(self._ids_by_document.items())
+        ids = np.concatenate([ids for _, ids in groups]) if groups else np.empty(0, dtype=np.int64)
+        document_ids = (
+            np.concatenate([np.full(len(ids), document_id, dtype=np.int64) for document_id, ids in groups])
+            if groups else np.empty(0, dtype=np.int64)
+        )
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, index=data, ids=ids, document_ids=document_ids, generation=generation)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def read(cls, path: str) -> Optional["VectorIndexManager"]:
+        """Load an index written by ``save``, or return None if there is none."""
+        try:
+            with np.load(path) as data:
+                index_data, ids, document_ids = data["index"], data["ids"], data["document_ids"]
+                generation = int(data["generation"]) if "generation" in data else None
+        except FileNotFoundError:
+            return None
+        manager = cls()
+        manager.generation = generation
+        if index_data.size:
+            manager._index = faiss.deserialize_index(index_data)
+            manager._dimension = manager._index.d
+        for document_id in np.unique(document_ids):
+            manager._ids_by_document[int(document_id)] = ids[document_ids == document_id]
+        return manager
+
+    def remove_document(self, document_id: int) -> int:
+        """Drop every vector that belongs to ``document_id``."""
+        with self._lock:
+            ids = self._ids_by_document.pop(document_id, None)
+            if ids is None or self._index is None:
+                return 0
+            return int(self._index.remove_ids(ids))
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 3,
+        document_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Return ``(embedding_id, cosine_similarity)`` pairs, best first."""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return []
+            params = None
+            if document_id is not None:
+                ids = self._ids_by_document.get(document_id)
+                if ids is None:
+                    return []
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+            query = self._prepare(query_vector)
+            scores, ids = self._index.search(query, k, params=params)
+        return [
+            (int(id_), float(score))
+            for id_, score in zip(ids[0], scores[0])
+            if id_ != -1
+        ]
+
+
+class VectorNamespaces:
+    """
+    Per-owner ``VectorIndexManager``s under a RAM budget.
+
+    A namespace is loaded from its snapshot under ``path`` if that is stamped
+    with the owner's current generation or, failing that, built from the
+    database. Only namespaces this process wrote to are saved, when they
+    are evicted or on shutdown.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.VECTOR_STORE_PATH,
+        max_bytes: int = settings.VECTOR_INDEX_MEMORY_MB * 1024 * 1024
+    ):
+        self.path = path
+        self._resident: NamespaceLRU[VectorIndexManager] = NamespaceLRU(
+            max_bytes, lambda index: index.memory_bytes
+        )
+        self._lock = threading.Lock()
+        # Namespaces changed by this process since they were loaded or saved
+        self._dirty: Set[int] = set()
+        # The generation each loaded namespace reflects; missing once it
+        # has fallen behind
+        self._seen: Dict[int, int] = {}
+        self._loads = SingleFlight()
+
+    def snapshot_path(self, owner_id: int) -> str:
+        return os.path.join(self.path, f"owner-{owner_id}.npz")
+
+    def generation_path(self, owner_id: int) -> str:
+        return os.path.join(self.path, f"owner-{owner_id}.generation")
+
+    async def get(self, owner_id: int, embedding_repository) -> VectorIndexManager:
+        """Return the owner's current index, loading it (once) if needed."""
+        index = self._resident.get(owner_id)
+        if index is not None:
+            generation = await run_blocking(read_generation, self.generation_path(owner_id))
+            if self._seen.get(owner_id) == generation:
+                return index
+        return await self._loads.do(owner_id, lambda: self._load(owner_id, embedding_repository))
+
+    async def _load(self, owner_id: int, embedding_repository) -> VectorIndexManager:
+        # Read first: a write that lands after this is caught on the next get
+        generation = await run_blocking(read_generation, self.generation_path(owner_id))
+        index = await run_blocking(VectorIndexManager.read, self.snapshot_path(owner_id))
+        from_snapshot = index is not None and index.generation == generation
+        if not from_snapshot:
+            ids, document_ids, matrix = await embedding_repository.get_vectors(owner_id=owner_id)
+            index = VectorIndexManager()
+            await run_blocking(index.build, ids=ids, vectors=matrix, document_ids=document_ids)
+        with self._lock:
+            self._seen[owner_id] = generation
+            self._dirty.discard(owner_id)
+            evicted = self._resident.put(owner_id, index)
+        logger.info(
+            "Loaded vector namespace for owner %s (%d vectors, from %s)",
+            owner_id, len(index), "snapshot" if from_snapshot else "database"
+        )
+        for evicted_owner, evicted_index in evicted:
+            await self._persist(evicted_owner, evicted_index)
+        return index
+
+    async def _persist(self, owner_id: int, index: VectorIndexManager) -> None:
+        """Write a namespace's snapshot if this process changed it."""
+        with self._lock:
+            if owner_id not in self._dirty:
+                return
+            self._dirty.discard(owner_id)
+            generation = self._seen.get(owner_id)
+        if generation is not None:
+            await run_blocking(index.save, self.snapshot_path(owner_id), generation)
+
+    def _changed(self, owner_id: int, generation: int) -> None:
+        """Record a write to a loaded namespace; the caller holds ``self._lock``."""
+        if self._seen.get(owner_id) == generation - 1:
+            # Nobody else wrote in between: the copy is still complete
+            self._seen[owner_id] = generation
+            self._dirty.add(owner_id)
+        else:
+            # The copy missed someone else's write; reload it on next use
+            self._seen.pop(owner_id, None)
+            self._dirty.discard(owner_id)
+
+    async def add(self, owner_id: int, ids: Sequence[int], vectors, document_id: int) -> None:
+        """Add a document's embeddings to its owner's namespace."""
+        generation = await run_blocking(bump_generation, self.generation_path(owner_id))
+        evicted = []
+        with self._lock:
+            # A namespace that is not loaded picks the rows up from the database
+            index = self._resident.peek(owner_id)
+            if index is not None:
+                index.add(ids, vectors, document_id)
+                self._changed(owner_id, generation)
+                # The namespace grew; others may no longer fit the budget
+                evicted = self._resident.trim(keep=owner_id)
+        for evicted_owner, evicted_index in evicted:
+            await self._persist(evicted_owner, evicted_index)
+
+    async def remove_document(self, owner_id: int, document_id: int) -> int:
+        """Drop a document's vectors from its owner's namespace."""
+        generation = await run_blocking(bump_generation, self.generation_path(owner_id))
+        with self._lock:
+            index = self._resident.peek(owner_id)
+            if index is None:
+                return 0
+            removed = index.remove_document(document_id)
+            self._changed(owner_id, generation)
+            return removed
+
+    async def flush(self) -> None:
+        """Write snapshots for every loaded namespace this process changed."""
+        for owner_id, index in self._resident.items():
+            await self._persist(owner_id, index)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._resident.stats()
+
+
+@lru_cache()
+def get_vector_namespaces() -> VectorNamespaces:
+    return VectorNamespaces()
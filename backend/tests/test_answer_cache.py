@@ -0,0 +1,87 @@
+"""
+Tests for the semantic answer cache.
+"""
+from services.answer_cache import SemanticAnswerCache
+from services.embedding_cache import MemoryBackend
+
+ANSWER = {"answer": "Paris", "confidence": 1.0, "sources": []}
+
+def make_cache(threshold=0.95, shared=None):
+    return SemanticAnswerCache(threshold=threshold, max_entries=2, ttl=60, shared=shared)
+
+def test_similar_question_hits():
+    """A vector within the cosine threshold returns the stored answer."""
+    cache = make_cache()
+    cache.store([1.0, 0.0], 1, None, 3, ANSWER, cache.epoch(1))
+    
+    assert cache.lookup([0.99, 0.05], 1, None, 3, cache.epoch(1)) == ANSWER
+    assert cache.lookup([0.0, 1.0], 1, None, 3, cache.epoch(1)) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_scopes_are_separate():
+    """Answers are only reused for the same owner, document and top_k."""
+    cache = make_cache()
+    cache.store([1.0, 0.0], 1, 1, 3, ANSWER, cache.epoch(1))
+    
+    assert cache.lookup([1.0, 0.0], 2, 1, 3, cache.epoch(2)) is None
+    assert cache.lookup([1.0, 0.0], 1, 2, 3, cache.epoch(1)) is None
+    assert cache.lookup([1.0, 0.0], 1, 1, 5, cache.epoch(1)) is None
+    assert cache.lookup([1.0, 0.0], 1, None, 3, cache.epoch(1)) is None
+
+def test_invalidate_document_drops_dependent_scopes():
+    """Changing a document clears its scope and its owner's unrestricted scopes only."""
+    cache = make_cache()
+    for document_id in (None, 1, 2):
+        cache.store([1.0, 0.0], 1, document_id, 3, ANSWER, cache.epoch(1))
+    cache.store([1.0, 0.0], 2, None, 3, ANSWER, cache.epoch(2))
+    
+    cache.invalidate(1, 1)
+    
+    assert cache.lookup([1.0, 0.0], 2, None, 3, cache.epoch(2)) == ANSWER
+    assert cache.lookup([1.0, 0.0], 1, None, 3, cache.epoch(1)) is None
+    assert cache.lookup([1.0, 0.0], 1, 1, 3, cache.epoch(1)) is None
+    assert cache.lookup([1.0, 0.0], 1, 2, 3, cache.epoch(1)) == ANSWER
+
+def test_store_after_invalidation_is_dropped():
+    """An answer computed before an invalidation is not cached."""
+    cache = make_cache()
+    epoch = cache.epoch(1)
+    cache.invalidate(1, 1)
+    
+    cache.store([1.0, 0.0], 1, None, 3, ANSWER, epoch)
+    
+    assert cache.lookup([1.0, 0.0], 1, None, 3, cache.epoch(1)) is None
+
+def test_oldest_entries_evicted():
+    """Each scope keeps at most ``max_entries`` answers."""
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], 1, None, 3, {"answer": "a"}, cache.epoch(1))
+    cache.store([0.0, 1.0, 0.0], 1, None, 3, {"answer": "b"}, cache.epoch(1))
+    cache.store([0.0, 0.0, 1.0], 1, None, 3, {"answer": "c"}, cache.epoch(1))
+    
+    assert cache.lookup([1.0, 0.0, 0.0], 1, None, 3, cache.epoch(1)) is None
+    assert cache.lookup([0.0, 0.0, 1.0], 1, None, 3, cache.epoch(1)) == {"answer": "c"}
+
+def test_invalidation_reaches_other_workers():
+    """An invalidation in one worker hides the owner's answers cached by another."""
+    shared = MemoryBackend(100)
+    worker, other_worker = make_cache(shared=shared), make_cache(shared=shared)
+    other_worker.store([1.0, 0.0], 1, 2, 3, ANSWER, other_worker.epoch(1))
+    other_worker.store([1.0, 0.0], 2, None, 3, ANSWER, other_worker.epoch(2))
+    
+    worker.invalidate(1, 1)
+    
+    assert other_worker.lookup([1.0, 0.0], 1, 2, 3, other_worker.epoch(1)) is None
+    assert other_worker.lookup([1.0, 0.0], 2, None, 3, other_worker.epoch(2)) == ANSWER
+
+def test_stale_generation_is_not_served():
+    """An answer computed before another worker's invalidation is never returned."""
+    shared = MemoryBackend(100)
+    worker, other_worker = make_cache(shared=shared), make_cache(shared=shared)
+    epoch = other_worker.epoch(1)
+    worker.invalidate(1)
+    
+    other_worker.store([1.0, 0.0], 1, None, 3, ANSWER, epoch)
+    
+    assert other_worker.lookup([1.0, 0.0], 1, None, 3, other_worker.epoch(1)) is None
@@ -0,0 +1,57 @@
+"""
+Tests for token-budgeted context packing.
+"""
+from langchain.schema import Document
+from services.context_packer import ContextPacker, overlap_length
+
+def chunk(source, index, text):
+    return Document(page_content=text, metadata={"source": source, "chunk_index": index})
+
+def test_overlap_length_finds_repeated_text():
+    """The shared suffix/prefix of neighbouring chunks is detected."""
+    assert overlap_length("alpha beta gamma delta", "gamma delta epsilon", 200) == len("gamma delta")
+    assert overlap_length("alpha beta", "gamma delta", 200) == 0
+
+def test_adjacent_chunks_are_merged_without_overlap():
+    """Consecutive chunks of a document become one passage."""
+    packer = ContextPacker(max_tokens=1000, max_overlap=200)
+    chunks = [
+        chunk("1", 1, "gamma delta epsilon zeta"),
+        chunk("1", 0, "alpha beta gamma delta"),
+    ]
+    
+    selected, context = packer.pack(chunks)
+    
+    assert selected == chunks
+    assert [doc.page_content for doc in context] == ["alpha beta gamma delta epsilon zeta"]
+    assert context[0].metadata["chunk_index"] == 0
+
+def test_passages_follow_relevance_order():
+    """Passages are ordered by their most relevant chunk."""
+    packer = ContextPacker(max_tokens=1000, max_overlap=200)
+    chunks = [chunk("2", 5, "most relevant"), chunk("1", 0, "less relevant")]
+    
+    _, context = packer.pack(chunks)
+    
+    assert [doc.metadata["source"] for doc in context] == ["2", "1"]
+
+def test_budget_limits_selection():
+    """Chunks that would exceed the budget are left out."""
+    packer = ContextPacker(max_tokens=10, max_overlap=200)
+    chunks = [
+        chunk("1", 0, "one two three four five six"),
+        chunk("2", 0, "seven eight nine ten eleven twelve thirteen"),
+        chunk("3", 0, "short"),
+    ]
+    
+    selected, _ = packer.pack(chunks)
+    
+    assert [doc.metadata["source"] for doc in selected] == ["1", "3"]
+
+def test_oversized_first_chunk_is_trimmed():
+    """The best chunk is trimmed rather than sending no context."""
+    packer = ContextPacker(max_tokens=3, max_overlap=200)
+    
+    selected, _ = packer.pack([chunk("1", 0, "one two three four five six")])
+    
+    assert packer.count_tokens(selected[0].page_content) <= 3
@@ -0,0 +1,22 @@
+"""
+Tests for batched embedding generation.
+"""
+from services.embedding_batcher import batch_by_tokens
+
+def test_batch_by_tokens_respects_token_budget():
+    """Batches close before exceeding the token budget."""
+    batches = list(batch_by_tokens([4, 4, 4, 4, 4], max_tokens=10, max_items=100))
+    
+    assert batches == [range(0, 2), range(2, 4), range(4, 5)]
+
+def test_batch_by_tokens_respects_item_limit():
+    """Batches close once they hold ``max_items`` texts."""
+    batches = list(batch_by_tokens([1] * 5, max_tokens=100, max_items=2))
+    
+    assert batches == [range(0, 2), range(2, 4), range(4, 5)]
+
+def test_batch_by_tokens_oversized_item():
+    """An oversized text is sent on its own."""
+    batches = list(batch_by_tokens([3, 50, 3], max_tokens=10, max_items=100))
+    
+    assert batches == [range(0, 1), range(1, 2), range(2, 3)]
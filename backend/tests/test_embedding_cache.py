@@ -0,0 +1,88 @@
+"""
+Tests for the query embedding cache.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock
+from services.embedding_cache import (
+    CachedEmbeddings,
+    LRUCache,
+    MemoryBackend,
+    QueryEmbeddingCache,
+)
+
+def make_cache(local_size=10):
+    return QueryEmbeddingCache(local_size=local_size, shared=MemoryBackend(100), ttl=60)
+
+def test_lru_evicts_least_recently_used():
+    """The oldest untouched entry is dropped first."""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_normalized_questions_share_an_entry():
+    """Case and whitespace differences hit the same cached vector."""
+    embeddings = Mock()
+    embeddings.embed_query.return_value = [0.5, 0.25]
+    cached = CachedEmbeddings(embeddings, make_cache(), "test-model")
+    
+    first = cached.embed_query("What is  RAG?")
+    second = cached.embed_query("what is rag?")
+    
+    assert first == second == [0.5, 0.25]
+    embeddings.embed_query.assert_called_once()
+
+def test_shared_tier_fills_local_tier():
+    """A miss in the local LRU is served from the shared tier and promoted."""
+    cache = make_cache()
+    key = cache.key("question", "test-model")
+    cache.set(key, [1.0, 2.0])
+    cache.local = LRUCache(10)
+    
+    assert cache.get(key) == [1.0, 2.0]
+    assert cache.get(key) == [1.0, 2.0]
+    assert cache.stats()["shared_hits"] == 1
+    assert cache.stats()["local_hits"] == 1
+
+def test_prefixes_separate_caches_on_one_backend():
+    """Caches sharing a backend under different prefixes never see each other's vectors."""
+    shared = MemoryBackend(100)
+    queries = QueryEmbeddingCache(local_size=10, shared=shared, ttl=60)
+    sentences = QueryEmbeddingCache(local_size=10, shared=shared, ttl=60, prefix="semb")
+    sentences.set(sentences.key("text", "test-model"), [1.0])
+    
+    assert queries.get(queries.key("text", "test-model")) is None
+    assert queries.stats()["misses"] == 1
+
+def test_stats_count_misses():
+    """Misses are counted and reflected in the hit rate."""
+    embeddings = Mock()
+    embeddings.embed_query.return_value = [0.1]
+    cache = make_cache()
+    cached = CachedEmbeddings(embeddings, cache, "test-model")
+    
+    cached.embed_query("q1")
+    cached.embed_query("q1")
+    
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["local_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_document_embeddings_only_embed_misses():
+    """Batch embedding reuses cached texts and sends only the misses upstream."""
+    embeddings = Mock(aembed_documents=AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts]))
+    cached = CachedEmbeddings(embeddings, make_cache(), "test-model")
+    
+    first = await cached.aembed_documents(["one", "three"])
+    second = await cached.aembed_documents(["three", "seven", "one"])
+    
+    assert first == [[3.0], [5.0]]
+    assert second == [[5.0], [5.0], [3.0]]
+    assert embeddings.aembed_documents.await_args.args[0] == ["seven"]
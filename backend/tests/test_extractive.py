@@ -0,0 +1,63 @@
+"""
+Tests for extractive (LLM-free) answers.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock
+from langchain.schema import Document
+from services.extractive import SentenceExtractor, split_sentences
+
+def fake_vectors(texts):
+    # One axis per topic, so similarity to the question is easy to predict
+    return [[1.0, 0.0] if "Paris" in text else [0.0, 1.0] for text in texts]
+
+@pytest.fixture
+def embeddings():
+    return Mock(aembed_documents=AsyncMock(side_effect=fake_vectors))
+
+def test_split_sentences():
+    """Text is split at sentence punctuation and line breaks; fragments are dropped."""
+    text = 'The capital of France is Paris. It has a famous "iron tower." Short.\nWhat is the river called?'
+
+    assert split_sentences(text) == [
+        "The capital of France is Paris.",
+        'It has a famous "iron tower."',
+        "What is the river called?",
+    ]
+
+@pytest.mark.asyncio
+async def test_extract_ranks_sentences_by_similarity(embeddings):
+    """The sentence closest to the question comes first, with its chunk."""
+    # Arrange
+    documents = [
+        Document(page_content="Wine is produced in many regions. Cheese is everywhere.", metadata={"chunk_index": 0}),
+        Document(page_content="The capital of France is Paris.", metadata={"chunk_index": 1}),
+    ]
+
+    # Act
+    spans = await SentenceExtractor(embeddings).extract([1.0, 0.0], documents, max_spans=2)
+
+    # Assert
+    assert len(spans) == 2
+    assert spans[0].text == "The capital of France is Paris."
+    assert spans[0].score == pytest.approx(1.0)
+    assert spans[0].document is documents[1]
+    assert spans[1].score == pytest.approx(0.0)
+
+@pytest.mark.asyncio
+async def test_extract_embeds_repeated_sentences_once(embeddings):
+    """Sentences repeated by overlapping chunks are embedded and returned once."""
+    # Arrange
+    sentence = "The capital of France is Paris."
+    documents = [
+        Document(page_content=f"Intro sentence for this chunk. {sentence}"),
+        Document(page_content=f"{sentence} Another sentence follows it."),
+    ]
+
+    # Act
+    spans = await SentenceExtractor(embeddings).extract([1.0, 0.0], documents)
+
+    # Assert
+    embedded = embeddings.aembed_documents.await_args.args[0]
+    assert embedded.count(sentence) == 1
+    assert [span.text for span in spans].count(sentence) == 1
+    assert spans[0].document is documents[0]
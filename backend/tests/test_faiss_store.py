@@ -0,0 +1,102 @@
+"""
+Tests for the hot-reloading FAISS index holder.
+"""
+import pytest
+from unittest.mock import Mock, patch
+from langchain.schema import Document
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from core.exceptions import VectorStoreError
+from services.faiss_store import (
+    FaissIndexHolder,
+    FaissIndexWriter,
+    read_index_version,
+    remove_tagged,
+)
+
+def write_documents(path, documents, embeddings):
+    writer = FaissIndexWriter(path, embeddings)
+    writer.add(documents, embeddings.embed_documents([doc.page_content for doc in documents]))
+    return writer.flush()
+
+def fake_store(name):
+    # Just enough of a FAISS store for the size estimate
+    return Mock(name=name, index=Mock(ntotal=0, d=8), docstore=Mock(_dict={}))
+
+@pytest.fixture
+def index_dir(tmp_path):
+    (tmp_path / "VERSION").write_text("1")
+    return tmp_path
+
+def test_current_before_load(index_dir):
+    """Querying before the first load fails loudly."""
+    holder = FaissIndexHolder(str(index_dir), Mock())
+    
+    with pytest.raises(VectorStoreError):
+        holder.current
+
+def test_refresh_only_reloads_new_versions(index_dir):
+    """The index is read from disk once per version."""
+    holder = FaissIndexHolder(str(index_dir), Mock())
+    
+    with patch("services.faiss_store.FAISS.load_local") as mock_load:
+        mock_load.side_effect = [fake_store("v1"), fake_store("v2")]
+        
+        assert holder.refresh() is True
+        first = holder.current
+        assert holder.refresh() is False
+        assert mock_load.call_count == 1
+        
+        (index_dir / "VERSION").write_text("2")
+        assert holder.refresh() is True
+    
+    assert holder.version == "2"
+    assert holder.current is not first
+
+
+def test_writer_loads_index_once(tmp_path):
+    """Flushing an upload's batches does not reload the index each time."""
+    embeddings = FakeEmbeddings(size=8)
+    write_documents(str(tmp_path), [Document(page_content="a")], embeddings)
+    writer = FaissIndexWriter(str(tmp_path), embeddings)
+    
+    with patch("services.faiss_store.FAISS.load_local", wraps=FAISS.load_local) as mock_load:
+        for text in ("b", "c", "d"):
+            writer.add([Document(page_content=text)], [[0.1] * 8])
+            writer.flush()
+    
+    assert mock_load.call_count == 1
+    assert writer.store.index.ntotal == 4
+    assert read_index_version(str(tmp_path)) == writer.version
+
+def test_writer_keeps_concurrent_uploads(tmp_path):
+    """Chunks written by another upload between flushes are not lost."""
+    embeddings = FakeEmbeddings(size=8)
+    writer = FaissIndexWriter(str(tmp_path), embeddings)
+    writer.add([Document(page_content="a")], [[0.1] * 8])
+    writer.flush()
+    
+    write_documents(str(tmp_path), [Document(page_content="other")], embeddings)
+    writer.add([Document(page_content="b")], [[0.2] * 8])
+    store, _ = writer.flush()
+    
+    assert store.index.ntotal == 3
+
+def test_remove_tagged(tmp_path):
+    """Chunks from an interrupted job can be removed before it is retried."""
+    embeddings = FakeEmbeddings(size=8)
+    write_documents(
+        str(tmp_path),
+        [
+            Document(page_content="a", metadata={"job_id": "old"}),
+            Document(page_content="b", metadata={"job_id": "retry"}),
+            Document(page_content="c", metadata={"job_id": "retry"}),
+        ],
+        embeddings
+    )
+    
+    removed = remove_tagged(str(tmp_path), "job_id", "retry", embeddings)
+    
+    store = FAISS.load_local(str(tmp_path), embeddings, allow_dangerous_deserialization=True)
+    assert removed == 2
+    assert store.index.ntotal == 1
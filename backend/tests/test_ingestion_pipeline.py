@@ -0,0 +1,92 @@
+"""
+Tests for the streaming ingestion pipeline.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from langchain.schema import Document
+from services.ingestion_pipeline import IngestionPipeline
+
+@pytest.fixture
+def embedder():
+    embedder = Mock(max_concurrency=2, max_batch_tokens=4, max_batch_size=10)
+    embedder.count_tokens.return_value = 1
+    embedder.embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    return embedder
+
+@pytest.fixture
+def text_splitter():
+    splitter = Mock()
+    splitter.split_text.side_effect = lambda text: text.split()
+    return splitter
+
+@pytest.mark.asyncio
+async def test_pipeline_stores_every_chunk(embedder, text_splitter):
+    """All chunks of all pages are embedded and stored in token-bounded batches."""
+    stored = []
+    stages = []
+    
+    async def store(batch, vectors):
+        assert len(batch) <= 4
+        stored.extend(zip([doc.page_content for doc in batch], vectors))
+    
+    async def on_stage(stage):
+        stages.append(stage)
+    
+    pipeline = IngestionPipeline(text_splitter, embedder, store, queue_size=1, on_stage=on_stage)
+    pages = iter([
+        Document(page_content="a bb ccc", metadata={"page": 0}),
+        Document(page_content="dddd eeeee ffffff", metadata={"page": 1}),
+    ])
+    
+    count = await pipeline.run(pages)
+    
+    assert count == 6
+    assert sorted(stored) == [
+        ("a", [1.0]), ("bb", [2.0]), ("ccc", [3.0]),
+        ("dddd", [4.0]), ("eeeee", [5.0]), ("ffffff", [6.0]),
+    ]
+    assert stages == ["parsing", "embedding", "indexing"]
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_updates_never_overlap(embedder, text_splitter):
+    """Stages entered from different tasks are reported one at a time, in order."""
+    stages = []
+    active = 0
+    
+    async def store(batch, vectors):
+        pass
+    
+    async def on_stage(stage):
+        nonlocal active
+        active += 1
+        assert active == 1
+        await asyncio.sleep(0.01)
+        stages.append(stage)
+        active -= 1
+    
+    pipeline = IngestionPipeline(text_splitter, embedder, store, queue_size=1, on_stage=on_stage)
+    # A blank last page lets the embedders finish while parsing is still reporting
+    pages = iter([
+        Document(page_content="a bb", metadata={"page": 0}),
+        Document(page_content="", metadata={"page": 1}),
+    ])
+    
+    await pipeline.run(pages)
+    
+    assert stages[0] == "parsing"
+    assert stages[-1] == "indexing"
+    assert len(stages) == len(set(stages))
+    assert "embedding" not in stages or stages.index("embedding") < stages.index("indexing")
+
+@pytest.mark.asyncio
+async def test_pipeline_propagates_store_errors(embedder, text_splitter):
+    """A failing stage cancels the others and surfaces the error."""
+    async def store(batch, vectors):
+        raise RuntimeError("disk full")
+    
+    pipeline = IngestionPipeline(text_splitter, embedder, store, queue_size=1)
+    pages = iter([Document(page_content="a b c d e f g h", metadata={})] * 20)
+    
+    with pytest.raises(RuntimeError):
+        await pipeline.run(pages)
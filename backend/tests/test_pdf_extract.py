@@ -0,0 +1,24 @@
+"""
+Tests for process-pool PDF extraction.
+"""
+import os
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from services.pdf_extract import iter_pdf_pages
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "..", "uploads", "pharma_companies_report.pdf")
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+def test_pages_match_sequential_extraction(pool):
+    """Parallel extraction returns every page, in order, with the same text."""
+    expected = [page.extract_text() or "" for page in PdfReader(SAMPLE_PDF).pages]
+    
+    pages = list(iter_pdf_pages(SAMPLE_PDF, pool, pages_per_task=1))
+    
+    assert [page.page_content for page in pages] == expected
+    assert [page.metadata["page"] for page in pages] == list(range(len(expected)))
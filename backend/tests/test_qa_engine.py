@@ -0,0 +1,22 @@
+"""
+Tests for the legacy Q&A service.
+"""
+from langchain.schema import Document
+from services.qa_engine import format_source, format_sources
+
+def test_format_source_hides_internal_metadata():
+    """Only the filename and page reach clients, never the stored path or job id."""
+    metadata = {
+        "source": "/app/uploads/0123abcd_report.pdf",
+        "filename": "report.pdf",
+        "page": 3,
+        "job_id": "0123abcd"
+    }
+
+    assert format_source(metadata) == {"filename": "report.pdf", "page": 3}
+
+def test_format_source_without_filename():
+    """Chunks indexed before filenames were recorded fall back to the upload's name."""
+    docs = [Document(page_content="text", metadata={"source": "/app/uploads/0123abcd_notes.txt"})]
+
+    assert format_sources(docs) == [{"filename": "notes.txt", "page": None}]
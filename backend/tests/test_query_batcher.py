@@ -0,0 +1,75 @@
+"""
+Tests for cross-request query embedding batching.
+"""
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+from services.query_batcher import BatchSizeHistogram, QueryEmbeddingBatcher
+
+@pytest.fixture
+def embeddings():
+    mock = Mock()
+    mock.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    return mock
+
+def test_concurrent_queries_share_one_call(embeddings):
+    """Queries arriving within the window go upstream together."""
+    batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=8, max_wait_ms=50)
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        vectors = list(pool.map(batcher.embed_query, ["a", "bb", "ccc", "dddd"]))
+    
+    assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+    assert embeddings.embed_documents.call_count == 1
+    assert batcher.stats()["batch_sizes"]["buckets"]["le_4"] == 1
+
+def test_full_batch_is_sent_without_waiting(embeddings):
+    """A batch is cut as soon as it reaches ``max_batch_size``."""
+    batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=2, max_wait_ms=10_000)
+    
+    futures = [batcher.submit(text) for text in ["a", "bb"]]
+    
+    assert [f.result(timeout=1) for f in futures] == [[1.0], [2.0]]
+
+def test_duplicate_queries_embedded_once(embeddings):
+    """Identical texts in one batch are sent upstream once."""
+    batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=3, max_wait_ms=10_000)
+    
+    futures = [batcher.submit(text) for text in ["a", "a", "b"]]
+    
+    assert [f.result(timeout=1) for f in futures] == [[1.0], [1.0], [1.0]]
+    embeddings.embed_documents.assert_called_once_with(["a", "b"])
+
+def test_errors_reach_every_caller(embeddings):
+    """A failed upstream call fails every query in the batch."""
+    embeddings.embed_documents.side_effect = RuntimeError("upstream down")
+    batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=2, max_wait_ms=10_000)
+    
+    futures = [batcher.submit(text) for text in ["a", "b"]]
+    
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+
+@pytest.mark.asyncio
+async def test_async_queries_are_batched(embeddings):
+    """Coroutines wait without blocking the loop and share a batch."""
+    batcher = QueryEmbeddingBatcher(embeddings, max_batch_size=8, max_wait_ms=20)
+    
+    vectors = await asyncio.gather(*(batcher.aembed_query(t) for t in ["a", "bb", "ccc"]))
+    
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embeddings.embed_documents.call_count == 1
+
+def test_histogram_buckets():
+    """Sizes land in the smallest power-of-two bucket that holds them."""
+    histogram = BatchSizeHistogram(max_size=10)
+    for size in (1, 3, 10):
+        histogram.observe(size)
+    
+    snapshot = histogram.snapshot()
+    
+    assert snapshot["buckets"] == {"le_1": 1, "le_2": 0, "le_4": 1, "le_8": 0, "le_10": 1}
+    assert snapshot["count"] == 3
+    assert snapshot["sum"] == 14
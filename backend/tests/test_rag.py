@@ -1,29 +1,75 @@
 """
 Tests for RAG service.
 """
+import numpy as np
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from services.rag import RAGService
-from core.exceptions import DocumentProcessingError, QuestionAnsweringError
+from services.answer_cache import SemanticAnswerCache
+from services.context_packer import ContextPacker
+from services.extractive import Span
+from services.prompts import NOT_FOUND_ANSWER, QA_PROMPT_TEMPLATE, CompiledPrompt
+from services.vector_index import VectorNamespaces
+from core.exceptions import DocumentProcessingError
 from db.repositories.document import DocumentRepository
 from db.repositories.embedding import EmbeddingRepository
 
+OWNER_ID = 1
+
+def store_vectors(repository, ids, vectors, document_id=1):
+    """Make ``get_vectors`` return these rows, as the database would."""
+    repository.get_vectors.return_value = (
+        np.asarray(ids, dtype=np.int64),
+        np.full(len(ids), document_id, dtype=np.int64),
+        np.asarray(vectors, dtype=np.float32)
+    )
+
 @pytest.fixture
 def mock_document_repository():
-    return Mock(spec=DocumentRepository)
+    return AsyncMock(spec=DocumentRepository)
 
 @pytest.fixture
 def mock_embedding_repository():
-    return Mock(spec=EmbeddingRepository)
+    repository = AsyncMock(spec=EmbeddingRepository)
+    store_vectors(repository, [], [])
+    return repository
+
+@pytest.fixture
+def vector_namespaces(tmp_path):
+    return VectorNamespaces(path=str(tmp_path), max_bytes=1024 * 1024)
+
+@pytest.fixture
+def providers():
+    providers = Mock(text_splitter=RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200))
+    providers.embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1, 0.2, 0.3] for _ in texts])
+    providers.query_embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    providers.qa_chain.acall = AsyncMock(return_value={"output_text": "Test answer"})
+    providers.qa_prompt = CompiledPrompt(QA_PROMPT_TEMPLATE)
+    providers.context_packer = ContextPacker(max_tokens=3000, max_overlap=200)
+    providers.openai_client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message=Mock(content="Native answer"))])
+    )
+    providers.llm.apredict = AsyncMock(return_value="Test summary")
+    return providers
+
+@pytest.fixture
+def answer_cache():
+    return SemanticAnswerCache(threshold=0.95, max_entries=10, ttl=60)
 
 @pytest.fixture
-def rag_service(mock_document_repository, mock_embedding_repository):
+def rag_service(mock_document_repository, mock_embedding_repository, vector_namespaces, answer_cache, providers):
     return RAGService(
         document_repository=mock_document_repository,
-        embedding_repository=mock_embedding_repository
+        embedding_repository=mock_embedding_repository,
+        vector_namespaces=vector_namespaces,
+        answer_cache=answer_cache,
+        providers=providers
     )
 
-def test_process_document_success(rag_service, mock_document_repository, mock_embedding_repository):
+@pytest.mark.asyncio
+async def test_process_document_success(rag_service, mock_document_repository, mock_embedding_repository, vector_namespaces):
     """Test successful document processing."""
     # Arrange
     content = "Test document content"
@@ -31,17 +77,78 @@ def test_process_document_success(rag_service, mock_document_repository, mock_em
     document_id = 1
     
     mock_document_repository.create.return_value = Mock(id=document_id)
-    mock_embedding_repository.create.return_value = Mock(id=1)
+    mock_embedding_repository.create_many.return_value = [1]
+    index = await vector_namespaces.get(OWNER_ID, mock_embedding_repository)
     
     # Act
-    result = rag_service.process_document(content, metadata)
+    result = await rag_service.process_document(content, metadata, OWNER_ID)
     
     # Assert
     assert result == document_id
-    mock_document_repository.create.assert_called_once()
-    assert mock_embedding_repository.create.call_count > 0
+    mock_document_repository.create.assert_awaited_once()
+    mock_embedding_repository.create_many.assert_awaited_once()
+    mock_embedding_repository.create.assert_not_called()
+    assert len(index) == 1
+
+@pytest.mark.asyncio
+async def test_process_document_invalidates_cached_answers(rag_service, mock_document_repository, mock_embedding_repository, answer_cache):
+    """A new upload drops the owner's cached answers, including "not found" ones."""
+    # Arrange
+    mock_document_repository.create.return_value = Mock(id=1)
+    mock_embedding_repository.create_many.return_value = [1]
+    answer_cache.store([0.1, 0.2, 0.3], OWNER_ID, None, 3, {"answer": NOT_FOUND_ANSWER}, answer_cache.epoch(OWNER_ID))
+    stages = []
+    
+    async def on_stage(stage):
+        stages.append(stage)
+    
+    # Act
+    await rag_service.process_document("Test document content", {}, OWNER_ID, on_stage=on_stage)
+    
+    # Assert
+    assert answer_cache.lookup([0.1, 0.2, 0.3], OWNER_ID, None, 3, answer_cache.epoch(OWNER_ID)) is None
+    assert stages[-1] == "indexing"
+
+@pytest.mark.asyncio
+async def test_process_document_reindexes_existing_document(rag_service, mock_document_repository, mock_embedding_repository, vector_namespaces):
+    """Retrying with a document id replaces its embeddings instead of adding a document."""
+    # Arrange
+    mock_embedding_repository.create_many.return_value = [2]
+    index = await vector_namespaces.get(OWNER_ID, mock_embedding_repository)
+    await vector_namespaces.add(OWNER_ID, [1], [[0.1, 0.2, 0.3]], document_id=5)
+    
+    # Act
+    result = await rag_service.process_document("Test document content", {}, OWNER_ID, document_id=5)
+    
+    # Assert
+    assert result == 5
+    mock_document_repository.create.assert_not_called()
+    mock_embedding_repository.delete_by_document.assert_awaited_once_with(5)
+    assert len(index) == 1
+
+@pytest.mark.asyncio
+async def test_process_pages_stores_content_page_by_page(rag_service, mock_document_repository, mock_embedding_repository):
+    """Each page is appended as it is processed and metadata is written at the end."""
+    # Arrange
+    mock_document_repository.create.return_value = Mock(id=1)
+    mock_embedding_repository.create_many.return_value = [1]
+    pages = iter([Document(page_content="First  page"), Document(page_content="Second page")])
+    
+    # Act
+    await rag_service.process_pages(pages, {"title": "Test Document"}, OWNER_ID)
+    
+    # Assert
+    assert mock_document_repository.create.await_args.kwargs["content"] == ""
+    assert [c.args for c in mock_document_repository.append_content.await_args_list] == [
+        (1, "First page"),
+        (1, "\fSecond page")
+    ]
+    metadata = mock_document_repository.update.await_args.kwargs["metadata"]
+    assert metadata["title"] == "Test Document"
+    assert metadata["page_count"] == 2
 
-def test_process_document_error(rag_service, mock_document_repository):
+@pytest.mark.asyncio
+async def test_process_document_error(rag_service, mock_document_repository):
     """Test document processing error."""
     # Arrange
     content = "Test document content"
@@ -51,61 +158,103 @@ def test_process_document_error(rag_service, mock_document_repository):
     
     # Act & Assert
     with pytest.raises(DocumentProcessingError):
-        rag_service.process_document(content, metadata)
+        await rag_service.process_document(content, metadata, OWNER_ID)
 
-def test_answer_question_success(rag_service, mock_embedding_repository):
+@pytest.mark.asyncio
+async def test_answer_question_success(rag_service, mock_embedding_repository, vector_namespaces, providers):
     """Test successful question answering."""
     # Arrange
     question = "What is the test question?"
     mock_embedding = Mock(
+        id=7,
         content="Test content",
         embedding=[0.1, 0.2, 0.3],
         document_id=1,
-        metadata={"chunk_index": 0}
+        chunk_index=0
     )
-    mock_embedding_repository.get_all.return_value = [mock_embedding]
+    store_vectors(mock_embedding_repository, [7], [mock_embedding.embedding])
+    mock_embedding_repository.get_by_ids.return_value = [mock_embedding]
     
     # Act
-    with patch("services.rag.ChatOpenAI") as mock_llm:
-        mock_llm.return_value.predict.return_value = "Test answer"
-        result = rag_service.answer_question(question)
+    result = await rag_service.answer_question(question, OWNER_ID)
     
     # Assert
-    assert "answer" in result
+    assert result["answer"] == "Test answer"
     assert "confidence" in result
-    assert "sources" in result
     assert isinstance(result["sources"], list)
+    mock_embedding_repository.get_by_ids.assert_awaited_once_with([7])
+    mock_embedding_repository.get_all.assert_not_called()
+    providers.qa_chain.acall.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_answer_question_overfetches_for_the_packer(rag_service, mock_embedding_repository, providers):
+    """Generated answers pack more than ``top_k`` chunks when the budget allows."""
+    # Arrange
+    ids = list(range(1, 9))
+    store_vectors(mock_embedding_repository, ids, [[1.0, 0.1 * i, 0.0] for i in ids])
+    mock_embedding_repository.get_by_ids.side_effect = lambda ids: [
+        Mock(id=id, content=f"Chunk {id}", document_id=1, chunk_index=id * 10) for id in ids
+    ]
+    
+    # Act
+    with patch("services.rag.settings.RETRIEVAL_MIN_SIMILARITY", 0.0):
+        result = await rag_service.answer_question("What?", OWNER_ID, top_k=2)
+    
+    # Assert
+    assert len(mock_embedding_repository.get_by_ids.await_args.args[0]) == 8
+    assert len(result["sources"]) == 8
 
-def test_answer_question_no_documents(rag_service, mock_embedding_repository):
-    """Test question answering with no documents."""
+@pytest.mark.asyncio
+async def test_answer_question_no_documents(rag_service, mock_embedding_repository, providers):
+    """With nothing indexed the question is answered as not found, without the LLM."""
     # Arrange
     question = "What is the test question?"
-    mock_embedding_repository.get_all.return_value = []
     
-    # Act & Assert
-    with pytest.raises(QuestionAnsweringError):
-        rag_service.answer_question(question)
+    # Act
+    result = await rag_service.answer_question(question, OWNER_ID)
+    
+    # Assert
+    assert result == {"answer": NOT_FOUND_ANSWER, "confidence": 0.0, "sources": []}
+    mock_embedding_repository.get_by_ids.assert_not_called()
+    providers.qa_chain.acall.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_answer_question_below_similarity_floor(rag_service, mock_embedding_repository, vector_namespaces, providers):
+    """Chunks less similar than the floor are ignored and the LLM is skipped."""
+    # Arrange
+    store_vectors(mock_embedding_repository, [7], [[1.0, 0.0, 0.0]])
+    providers.query_embeddings.aembed_query.return_value = [0.0, 1.0, 0.0]
+    
+    # Act
+    with patch("services.rag.settings.RETRIEVAL_MIN_SIMILARITY", 0.5):
+        result = await rag_service.answer_question("Unrelated question?", OWNER_ID)
+    
+    # Assert
+    assert result["answer"] == NOT_FOUND_ANSWER
+    assert result["sources"] == []
+    mock_embedding_repository.get_by_ids.assert_not_called()
+    providers.qa_chain.acall.assert_not_called()
 
-def test_generate_summary_success(rag_service, mock_document_repository):
+@pytest.mark.asyncio
+async def test_generate_summary_success(rag_service, mock_document_repository):
     """Test successful summary generation."""
     # Arrange
     document_id = 1
     mock_document = Mock(
         id=document_id,
+        owner_id=OWNER_ID,
         content="Test document content"
     )
     mock_document_repository.get.return_value = mock_document
     
     # Act
-    with patch("services.rag.ChatOpenAI") as mock_llm:
-        mock_llm.return_value.predict.return_value = "Test summary"
-        summary = rag_service.generate_summary(document_id)
+    summary = await rag_service.generate_summary(document_id, OWNER_ID)
     
     # Assert
-    assert isinstance(summary, str)
-    assert len(summary) > 0
+    assert summary == "Test summary"
 
-def test_generate_summary_document_not_found(rag_service, mock_document_repository):
+@pytest.mark.asyncio
+async def test_generate_summary_document_not_found(rag_service, mock_document_repository):
     """Test summary generation for non-existent document."""
     # Arrange
     document_id = 1
@@ -113,21 +262,163 @@ def test_generate_summary_document_not_found(rag_service, mock_document_reposito
     
     # Act & Assert
     with pytest.raises(DocumentProcessingError):
-        rag_service.generate_summary(document_id)
+        await rag_service.generate_summary(document_id, OWNER_ID)
+
+@pytest.mark.asyncio
+async def test_generate_summary_other_owners_document(rag_service, mock_document_repository, providers):
+    """A user cannot summarize a document that belongs to someone else."""
+    # Arrange
+    mock_document_repository.get.return_value = Mock(id=1, owner_id=OWNER_ID + 1, content="Private content")
+    
+    # Act & Assert
+    with pytest.raises(DocumentProcessingError):
+        await rag_service.generate_summary(1, OWNER_ID)
+    providers.llm.apredict.assert_not_called()
 
 def test_calculate_confidence(rag_service):
-    """Test confidence score calculation."""
+    """Confidence rescales the best similarity between the floor and 1."""
     # Arrange
-    result = {
-        "source_documents": [
-            Mock(metadata={"source": "1", "chunk_index": 0}),
-            Mock(metadata={"source": "1", "chunk_index": 1})
-        ]
-    }
+    source_documents = [
+        Mock(metadata={"source": "1", "chunk_index": 0, "score": 0.8}),
+        Mock(metadata={"source": "1", "chunk_index": 1, "score": 0.9})
+    ]
     
     # Act
-    confidence = rag_service._calculate_confidence(result)
+    with patch("services.rag.settings.RETRIEVAL_MIN_SIMILARITY", 0.5):
+        confidence = rag_service._calculate_confidence(source_documents)
     
     # Assert
     assert isinstance(confidence, float)
-    assert 0 <= confidence <= 1 
\ No newline at end of file
+    assert confidence == pytest.approx(0.8)
+    assert rag_service._calculate_confidence([]) == 0.0
+
+@pytest.mark.asyncio
+async def test_stream_answer_events(rag_service, mock_embedding_repository, vector_namespaces, providers):
+    """Streaming yields sources first, then tokens, then a final summary event."""
+    # Arrange
+    mock_embedding = Mock(
+        id=7,
+        content="Test content",
+        document_id=1,
+        chunk_index=0
+    )
+    store_vectors(mock_embedding_repository, [7], [[0.1, 0.2, 0.3]])
+    mock_embedding_repository.get_by_ids.return_value = [mock_embedding]
+    
+    async def fake_stream(prompt):
+        for token in ["Test", " answer"]:
+            yield Mock(content=token)
+    
+    providers.llm.astream = fake_stream
+    
+    # Act
+    events = [event async for event in rag_service.stream_answer("What?", OWNER_ID)]
+    
+    # Assert
+    assert [event["event"] for event in events] == ["sources", "token", "token", "done"]
+    assert events[0]["data"] == [{"document_id": "1", "chunk_index": 0}]
+    assert "".join(e["data"] for e in events if e["event"] == "token") == "Test answer"
+    assert set(events[-1]["data"]) == {"confidence", "timing"}
+
+@pytest.mark.asyncio
+async def test_generate_summary_uses_cache(mock_document_repository, mock_embedding_repository, vector_namespaces, providers):
+    """A cached summary for the same content skips the LLM entirely."""
+    # Arrange
+    mock_summary_repository = AsyncMock()
+    mock_summary_repository.get.return_value = Mock(summary="Cached summary")
+    mock_document_repository.get.return_value = Mock(id=1, owner_id=OWNER_ID, content="Test document content")
+    rag_service = RAGService(
+        document_repository=mock_document_repository,
+        embedding_repository=mock_embedding_repository,
+        vector_namespaces=vector_namespaces,
+        summary_repository=mock_summary_repository,
+        providers=providers
+    )
+    
+    # Act
+    summary = await rag_service.generate_summary(1, OWNER_ID)
+    
+    # Assert
+    assert summary == "Cached summary"
+    providers.llm.apredict.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_generate_summary_reduces_hierarchically(rag_service, providers):
+    """Summaries that exceed the context budget are merged in rounds."""
+    # Arrange
+    summaries = ["word " * 50] * 8
+    providers.llm.apredict.return_value = "short"
+    
+    # Act
+    with patch("services.rag.settings.SUMMARY_MAX_CONTEXT_TOKENS", 120):
+        combined = await rag_service._reduce_summaries(summaries)
+    
+    # Assert
+    assert providers.llm.apredict.await_count == 4
+    assert combined == "\n".join(["short"] * 4)
+
+@pytest.mark.asyncio
+async def test_answer_question_reuses_cached_answer(rag_service, mock_embedding_repository, vector_namespaces, providers):
+    """A near-duplicate question is answered from the cache without the LLM."""
+    # Arrange
+    mock_embedding = Mock(id=7, content="Test content", document_id=1, chunk_index=0)
+    store_vectors(mock_embedding_repository, [7], [[0.1, 0.2, 0.3]])
+    mock_embedding_repository.get_by_ids.return_value = [mock_embedding]
+    providers.query_embeddings.aembed_query.side_effect = [[0.1, 0.2, 0.3], [0.1, 0.2, 0.31]]
+    
+    # Act
+    first = await rag_service.answer_question("What is the test?", OWNER_ID)
+    second = await rag_service.answer_question("What's the test?", OWNER_ID)
+    
+    # Assert
+    assert second == first
+    providers.qa_chain.acall.assert_awaited_once()
+    mock_embedding_repository.get_by_ids.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_answer_question_native_pipeline(rag_service, mock_embedding_repository, vector_namespaces, providers):
+    """The native path makes one chat completion and returns the same shape."""
+    # Arrange
+    mock_embedding = Mock(id=7, content="Test content", document_id=1, chunk_index=0)
+    store_vectors(mock_embedding_repository, [7], [[0.1, 0.2, 0.3]])
+    mock_embedding_repository.get_by_ids.return_value = [mock_embedding]
+    
+    # Act
+    with patch("services.rag.settings.QA_PIPELINE", "native"):
+        result = await rag_service.answer_question("What is the test?", OWNER_ID)
+    
+    # Assert
+    assert result["answer"] == "Native answer"
+    assert set(result) == {"answer", "confidence", "sources"}
+    providers.qa_chain.acall.assert_not_called()
+    messages = providers.openai_client.chat.completions.create.await_args.kwargs["messages"]
+    assert "Test content" in messages[0]["content"]
+    assert "What is the test?" in messages[0]["content"]
+
+@pytest.mark.asyncio
+async def test_answer_question_extractive(rag_service, mock_embedding_repository, vector_namespaces, providers):
+    """Extractive mode returns the best sentence and its spans without the LLM."""
+    # Arrange
+    mock_embedding = Mock(id=7, content="The test answer is here. Nothing else matters.", document_id=1, chunk_index=0)
+    store_vectors(mock_embedding_repository, [7], [[0.1, 0.2, 0.3]])
+    mock_embedding_repository.get_by_ids.return_value = [mock_embedding]
+    providers.extractor.extract = AsyncMock(return_value=[
+        Span("The test answer is here.", 0.9, Document(page_content=mock_embedding.content, metadata={"source": "1", "chunk_index": 0, "score": 1.0}))
+    ])
+    
+    # Act
+    result = await rag_service.answer_question("What is the test?", OWNER_ID, mode="extractive")
+    
+    # Assert
+    assert result["answer"] == "The test answer is here."
+    assert result["sources"] == [{"document_id": "1", "chunk_index": 0}]
+    assert result["spans"] == [{"text": "The test answer is here.", "score": 0.9, "document_id": "1", "chunk_index": 0}]
+    providers.qa_chain.acall.assert_not_called()
+    providers.openai_client.chat.completions.create.assert_not_called()
+
+def test_compiled_prompt_matches_format():
+    """Rendering a compiled prompt equals str.format on the template."""
+    prompt = CompiledPrompt(QA_PROMPT_TEMPLATE)
+    
+    assert prompt.input_variables == ["context", "question"]
+    assert prompt.render(context="ctx", question="q?") == QA_PROMPT_TEMPLATE.format(context="ctx", question="q?")
@@ -0,0 +1,78 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+import pytest
+from services.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    """Callers with the same key get one result from one run."""
+    flights = SingleFlight()
+    calls = 0
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+    
+    results = await asyncio.gather(*(flights.do("q", work) for _ in range(5)))
+    
+    assert results == ["answer"] * 5
+    assert calls == 1
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    """A failed run raises in every coalesced caller and is not cached."""
+    flights = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(flights.do("q", fail), flights.do("q", fail), return_exceptions=True)
+    
+    assert all(isinstance(r, ValueError) for r in results)
+    assert await flights.do("q", lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """One client going away leaves the shared run alive."""
+    flights = SingleFlight()
+    
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+    
+    first = asyncio.ensure_future(flights.do("q", work))
+    second = asyncio.ensure_future(flights.do("q", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    
+    assert await second == "answer"
+
+@pytest.mark.asyncio
+async def test_stream_subscribers_receive_all_events():
+    """Late subscribers replay earlier events and the source runs once."""
+    flights = SingleFlight()
+    runs = 0
+    
+    async def events():
+        nonlocal runs
+        runs += 1
+        for token in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield token
+    
+    async def collect():
+        return [event async for event in flights.stream("q", events)]
+    
+    first = asyncio.ensure_future(collect())
+    await asyncio.sleep(0.015)
+    second = asyncio.ensure_future(collect())
+    
+    assert await first == ["a", "b", "c"]
+    assert await second == ["a", "b", "c"]
+    assert runs == 1
@@ -0,0 +1,57 @@
+"""
+Tests for text cleaning and metadata extraction.
+"""
+from utils.text_processing import PAGE_BREAK, MetadataCollector, clean_text, clean_texts, extract_metadata
+
+def test_clean_text_normalizes_and_collapses_whitespace():
+    """Ligatures, control characters and whitespace runs are normalized."""
+    text = "  ﬁrst  line\t here\r\n\r\n\n  second​ line \x00\n"
+
+    assert clean_text(text) == "first line here\n\nsecond line"
+
+def test_clean_text_keeps_page_breaks():
+    """Form feeds survive cleaning so pages can still be counted."""
+    assert clean_text("page one\fpage two") == "page one\fpage two"
+
+def test_clean_texts_matches_clean_text():
+    """Batched cleaning gives the same result as cleaning one by one."""
+    texts = ["  a  b ", "c\n\n\n d", "", "ﬁne\ttext"]
+
+    assert clean_texts(texts) == [clean_text(text) for text in texts]
+
+def test_extract_metadata():
+    """Language, pages, headings and dates are found in cleaned text."""
+    text = clean_text(
+        "INTRODUCTION\nThe results of this study are in the appendix.\f"
+        "1. Methods\nSamples were taken on 12 March 2024 and 2024-04-01.\n"
+        "# Results\nThe data is in the tables, as of March 3, 2023."
+    )
+
+    metadata = extract_metadata(text)
+
+    assert metadata["language"] == "en"
+    assert metadata["page_count"] == 2
+    assert metadata["headings"] == ["INTRODUCTION", "1. Methods", "Results"]
+    assert metadata["dates"] == ["12 March 2024", "2024-04-01", "March 3, 2023"]
+
+def test_extract_metadata_empty_text():
+    """Empty documents have no pages and an unknown language."""
+    metadata = extract_metadata("")
+
+    assert metadata["page_count"] == 0
+    assert metadata["language"] == "unknown"
+
+def test_metadata_collector_matches_extract_metadata():
+    """Metadata gathered page by page equals that of the joined document."""
+    pages = [
+        clean_text("INTRODUCTION\nThe results of this study are in the appendix."),
+        clean_text("1. Methods\nSamples were taken on 12 March 2024.\fAnd 2024-04-01."),
+        "",
+        clean_text("# Results\nThe data is in the tables, as of March 3, 2023."),
+    ]
+    collector = MetadataCollector()
+
+    for page in pages:
+        collector.add(page)
+
+    assert collector.metadata() == extract_metadata(PAGE_BREAK.join(pages))
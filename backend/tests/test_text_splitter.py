@@ -0,0 +1,71 @@
+"""
+Tests for the linear-time text splitter.
+"""
+from services.embedding_batcher import get_encoding
+from utils.text_splitter import LinearTextSplitter
+
+TEXT = "\n\n".join(
+    "\n".join(" ".join(f"word{p}{l}{w}" for w in range(12)) for l in range(3))
+    for p in range(20)
+)
+
+def test_chunks_respect_size_limit():
+    """No chunk is longer than ``chunk_size`` characters."""
+    splitter = LinearTextSplitter(chunk_size=200, chunk_overlap=40)
+    
+    chunks = splitter.split_text(TEXT)
+    
+    assert chunks
+    assert all(len(chunk) <= 200 for chunk in chunks)
+
+def test_prefers_paragraph_breaks():
+    """Chunks end at paragraph boundaries when one fits in the window."""
+    paragraph = "alpha beta gamma delta"
+    splitter = LinearTextSplitter(chunk_size=60, chunk_overlap=0)
+    
+    chunks = splitter.split_text("\n\n".join([paragraph] * 4))
+    
+    assert chunks == ["\n\n".join([paragraph] * 2)] * 2
+
+def test_every_word_is_kept():
+    """Splitting loses no text."""
+    splitter = LinearTextSplitter(chunk_size=150, chunk_overlap=30)
+    
+    words = set(" ".join(splitter.split_text(TEXT)).split())
+    
+    assert words == set(TEXT.split())
+
+def test_neighbouring_chunks_overlap():
+    """Consecutive chunks share up to ``chunk_overlap`` of text."""
+    splitter = LinearTextSplitter(chunk_size=100, chunk_overlap=30, separators=[" "])
+    
+    chunks = splitter.split_text(" ".join(f"w{i:03d}" for i in range(100)))
+    
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+
+def test_overlap_does_not_repeat_the_last_break():
+    """A strong break early in the text is not cut at again by the following chunks."""
+    text = " ".join(f"w{i}" for i in range(150)) + "\n\n" + " ".join(f"m{i:03d}" for i in range(400))
+    splitter = LinearTextSplitter(chunk_size=1000, chunk_overlap=200)
+    
+    chunks = splitter.split_text(text)
+    
+    assert len(chunks) <= 4
+    assert not any(current in previous for previous, current in zip(chunks, chunks[1:]))
+    assert chunks[-1].endswith("m399")
+
+def test_token_sizes():
+    """With an encoding, sizes are measured in tokens."""
+    encoding = get_encoding("gpt-3.5-turbo")
+    splitter = LinearTextSplitter(chunk_size=50, chunk_overlap=10, encoding=encoding)
+    
+    chunks = splitter.split_text(TEXT)
+    
+    assert all(len(encoding.encode_ordinary(chunk)) <= 50 for chunk in chunks)
+
+def test_oversized_word_is_hard_split():
+    """A run without separators longer than a chunk is cut at the limit."""
+    splitter = LinearTextSplitter(chunk_size=10, chunk_overlap=0)
+    
+    assert splitter.split_text("x" * 25) == ["x" * 10, "x" * 10, "x" * 5]
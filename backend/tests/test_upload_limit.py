@@ -0,0 +1,57 @@
+"""
+Tests for rejecting oversized uploads before the body is read.
+"""
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from middleware.upload_limit import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+MAX_SIZE = 1024
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_size=MAX_SIZE)
+
+    @app.post("/documents/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/echo")
+    async def echo(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+def test_small_upload_passes(client):
+    """Uploads within the limit reach the endpoint."""
+    response = client.post("/documents/upload", files={"file": ("a.txt", b"x" * MAX_SIZE)})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": MAX_SIZE}
+
+def test_declared_oversized_upload_rejected(client):
+    """A Content-Length over the limit is answered with 413."""
+    response = client.post("/documents/upload", files={"file": ("a.txt", b"x" * (MAX_SIZE + MULTIPART_OVERHEAD))})
+
+    assert response.status_code == 413
+    assert response.json()["detail"]["details"] == {"max_size": MAX_SIZE}
+
+def test_chunked_oversized_upload_rejected(client):
+    """Bodies without a Content-Length are cut off once they pass the limit."""
+    head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n'
+    chunks = iter([head] + [b"x" * MULTIPART_OVERHEAD] * 4 + [b"\r\n--b--\r\n"])
+
+    response = client.post(
+        "/documents/upload",
+        content=chunks,
+        headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+
+    assert response.status_code == 413
+
+def test_other_paths_unaffected(client):
+    """Only upload endpoints are limited."""
+    response = client.post("/echo", files={"file": ("a.txt", b"x" * (MAX_SIZE + MULTIPART_OVERHEAD))})
+
+    assert response.status_code == 200
@@ -0,0 +1,174 @@
+"""
+Tests for the long-lived vector index.
+"""
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+from core.exceptions import VectorStoreError
+from services.namespaces import NAMESPACE_OVERHEAD_BYTES
+from services.vector_index import VectorIndexManager, VectorNamespaces
+
+def owner_rows(owner_id):
+    # One vector per owner, pointing along the owner's own axis
+    vector = [1.0, 0.0] if owner_id == 1 else [0.0, 1.0]
+    return (
+        np.array([owner_id * 100], dtype=np.int64),
+        np.array([owner_id], dtype=np.int64),
+        np.array([vector], dtype=np.float32)
+    )
+
+@pytest.fixture
+def embedding_repository():
+    return AsyncMock(get_vectors=AsyncMock(side_effect=lambda owner_id: owner_rows(owner_id)))
+
+@pytest.fixture
+def vector_index():
+    index = VectorIndexManager()
+    index.build(
+        ids=[10, 11, 20],
+        vectors=[[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+        document_ids=[1, 1, 2]
+    )
+    return index
+
+def test_search_returns_embedding_ids(vector_index):
+    """Hits are keyed by embedding id and ordered by similarity."""
+    hits = vector_index.search([1.0, 0.1], k=2)
+    
+    assert [id for id, _ in hits] == [10, 20]
+    assert hits[0][1] == pytest.approx(0.995, abs=1e-3)
+
+def test_search_scoped_to_document(vector_index):
+    """Scoped searches only consider the document's vectors."""
+    hits = vector_index.search([1.0, 0.1], k=3, document_id=2)
+    
+    assert [id for id, _ in hits] == [20]
+    assert vector_index.search([1.0, 0.0], document_id=99) == []
+
+def test_add_and_remove_document(vector_index):
+    """Ingestion and deletion update the index in place."""
+    vector_index.add([30], [[-1.0, 0.0]], document_id=3)
+    assert len(vector_index) == 4
+    assert vector_index.search([-1.0, 0.0], k=1)[0][0] == 30
+    
+    assert vector_index.remove_document(1) == 2
+    assert len(vector_index) == 2
+    assert all(id != 10 for id, _ in vector_index.search([1.0, 0.0], k=3))
+
+def test_dimension_mismatch(vector_index):
+    """Vectors of the wrong size are rejected."""
+    with pytest.raises(VectorStoreError):
+        vector_index.add([40], [[1.0, 0.0, 0.0]], document_id=4)
+
+def test_save_and_read_round_trip(vector_index, tmp_path):
+    """A saved index searches and deletes like the original."""
+    path = str(tmp_path / "index.npz")
+    vector_index.save(path)
+    
+    restored = VectorIndexManager.read(path)
+    
+    assert len(restored) == 3
+    assert restored.generation == 0
+    assert restored.search([1.0, 0.1], k=2) == vector_index.search([1.0, 0.1], k=2)
+    assert restored.remove_document(1) == 2
+    assert VectorIndexManager.read(str(tmp_path / "missing.npz")) is None
+
+@pytest.mark.asyncio
+async def test_namespaces_are_isolated(embedding_repository, tmp_path):
+    """Each owner's index only holds that owner's vectors."""
+    namespaces = VectorNamespaces(path=str(tmp_path), max_bytes=1024 * 1024)
+    
+    first = await namespaces.get(1, embedding_repository)
+    second = await namespaces.get(2, embedding_repository)
+    
+    assert first is not second
+    assert [id for id, _ in first.search([0.0, 1.0], k=5)] == [100]
+    assert [id for id, _ in second.search([1.0, 0.0], k=5)] == [200]
+    assert await namespaces.get(1, embedding_repository) is first
+    assert embedding_repository.get_vectors.await_count == 2
+
+@pytest.mark.asyncio
+async def test_evicted_namespace_reloads_from_snapshot(embedding_repository, tmp_path):
+    """Namespaces over the budget are written to disk and read back on next use."""
+    # Arrange: room for a single resident namespace
+    namespaces = VectorNamespaces(path=str(tmp_path), max_bytes=1)
+    first = await namespaces.get(1, embedding_repository)
+    await namespaces.add(1, [101], [[1.0, 1.0]], document_id=1)
+    
+    # Act
+    await namespaces.get(2, embedding_repository)
+    reloaded = await namespaces.get(1, embedding_repository)
+    
+    # Assert
+    assert namespaces.stats()["evictions"] == 2
+    assert reloaded is not first
+    assert len(reloaded) == 2
+    assert embedding_repository.get_vectors.await_count == 2
+
+@pytest.mark.asyncio
+async def test_write_to_unloaded_namespace_outdates_snapshot(embedding_repository, tmp_path):
+    """Changes to an evicted namespace are picked up from the database, not a stale snapshot."""
+    # Arrange
+    namespaces = VectorNamespaces(path=str(tmp_path), max_bytes=1)
+    await namespaces.get(1, embedding_repository)
+    await namespaces.add(1, [101], [[1.0, 1.0]], document_id=1)
+    await namespaces.get(2, embedding_repository)
+    assert (tmp_path / "owner-1.npz").exists()
+    
+    # Act
+    await namespaces.add(1, [102], [[1.0, 1.0]], document_id=1)
+    await namespaces.get(1, embedding_repository)
+    
+    # Assert
+    assert embedding_repository.get_vectors.await_count == 3
+
+@pytest.mark.asyncio
+async def test_unchanged_namespace_is_not_saved(embedding_repository, tmp_path):
+    """Namespaces built from the database and never written to are dropped on eviction."""
+    # Arrange
+    namespaces = VectorNamespaces(path=str(tmp_path), max_bytes=1)
+    await namespaces.get(1, embedding_repository)
+    
+    # Act
+    await namespaces.get(2, embedding_repository)
+    await namespaces.flush()
+    
+    # Assert
+    assert not (tmp_path / "owner-1.npz").exists()
+    assert not (tmp_path / "owner-2.npz").exists()
+
+@pytest.mark.asyncio
+async def test_write_in_another_process_reloads_namespace(embedding_repository, tmp_path):
+    """A namespace changed by another worker is reloaded instead of served stale."""
+    # Arrange: two workers sharing the snapshot directory
+    worker = VectorNamespaces(path=str(tmp_path), max_bytes=1024 * 1024)
+    other_worker = VectorNamespaces(path=str(tmp_path), max_bytes=1024 * 1024)
+    stale = await worker.get(1, embedding_repository)
+    await other_worker.get(1, embedding_repository)
+    
+    # Act
+    await other_worker.add(1, [101], [[1.0, 1.0]], document_id=1)
+    await other_worker.flush()
+    await worker.flush()
+    reloaded = await worker.get(1, embedding_repository)
+    
+    # Assert
+    assert reloaded is not stale
+    assert len(reloaded) == 2
+    assert embedding_repository.get_vectors.await_count == 2
+
+@pytest.mark.asyncio
+async def test_growing_namespace_evicts_others(embedding_repository, tmp_path):
+    """Writes to a loaded namespace re-check the budget and evict colder ones to disk."""
+    # Arrange: both namespaces fit as loaded, but not once owner 1 grows
+    namespaces = VectorNamespaces(path=str(tmp_path), max_bytes=2 * NAMESPACE_OVERHEAD_BYTES + 100)
+    await namespaces.get(2, embedding_repository)
+    grown = await namespaces.get(1, embedding_repository)
+    
+    # Act
+    await namespaces.add(1, list(range(1000, 1010)), [[1.0, 0.0]] * 10, document_id=1)
+    
+    # Assert
+    assert namespaces.stats()["resident"] == 1
+    assert namespaces.stats()["evictions"] == 1
+    assert await namespaces.get(1, embedding_repository) is grown
@@ -0,0 +1,32 @@
+"""
+Bounded thread pool for the blocking work left in async code paths.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+from core.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+@lru_cache()
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Process-wide pool; also installed as the event loop's default executor."""
+    return ThreadPoolExecutor(
+        max_workers=settings.BLOCKING_WORKERS,
+        thread_name_prefix="blocking"
+    )
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn`` on the bounded pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_blocking_executor(),
+        functools.partial(fn, *args, **kwargs)
+    )
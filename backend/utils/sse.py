@@ -0,0 +1,48 @@
+"""
+Server-Sent Events helpers for streaming endpoints.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one event in the text/event-stream wire format."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream ``{"event": ..., "data": ...}`` dicts as an SSE response.
+
+    The first event is awaited before the response starts, so failures that
+    happen before anything is sent (e.g. retrieval) still surface as normal
+    HTTP errors. Later failures are reported as an ``error`` event.
+    """
+    first = await events.__anext__()
+
+    async def body() -> AsyncIterator[str]:
+        yield format_sse(first["event"], first["data"])
+        try:
+            async for event in events:
+                yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.exception("Error while streaming response")
+            yield format_sse("error", {"message": str(e)})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def wants_event_stream(accept: str) -> bool:
+    """Whether an Accept header asks for Server-Sent Events."""
+    return "text/event-stream" in (accept or "")
@@ -0,0 +1,212 @@
+"""
+Text normalization and metadata extraction for ingested documents.
+
+Everything here runs on every uploaded page, so the hot paths stay in C:
+patterns are compiled once at import, Unicode normalization is skipped when
+the text is already normalized, character clean-up is a single
+``str.translate`` and all whitespace collapsing is one regex pass.
+Metadata is gathered by lazy ``finditer`` scans that stop as soon as they
+have enough, instead of materializing every line of the document.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, List, Sequence
+
+# Page separator kept by ``clean_text`` and counted by ``extract_metadata``
+PAGE_BREAK = "\f"
+
+MAX_HEADINGS = 50
+MAX_DATES = 50
+# Language detection only needs the first few thousand characters
+LANGUAGE_SAMPLE_CHARS = 20000
+
+# Control and invisible characters to drop; tab, newline, CR and form feed
+# are left for the whitespace pass
+_DELETE = dict.fromkeys(
+    [c for c in range(0x20) if c not in (0x09, 0x0A, 0x0C, 0x0D)]
+    + [0x7F, 0x00AD, 0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF]
+)
+
+# One pass over all whitespace. Single spaces between words are not matched,
+# so the replacement callback only runs where something actually changes; the
+# leading lookahead lets the engine skip non-space characters cheaply.
+_WHITESPACE = re.compile(
+    r"(?=\s)(?:"
+    r"\n[^\S\f]*"                  # line breaks and the blanks around them
+    r"|[^\S\n\f]+\n[^\S\f]*"
+    r"|[^\S\n\f]{2,}"               # runs of spaces
+    r"|[^\S \n\f]"                  # a lone tab, CR, ...
+    r")"
+)
+
+# Joins a batch for ``clean_texts``. NUL keeps ASCII text ASCII (so the
+# regex and normalization fast paths still apply) and is not whitespace;
+# the batch is cleaned with a table that leaves it in place.
+_BATCH_SEPARATOR = "\x00"
+_DELETE_BATCH = {c: None for c in _DELETE if c != 0}
+
+# Headings start and end at line or page boundaries
+_HEADING = re.compile(
+    r"(?:^|(?<=\f))[^\S\n\f]*("
+    r"#{1,6}[^\S\n\f]+\S[^\n\f]{0,100}"                          # Markdown
+    r"|(?:\d+(?:\.\d+)*\.?|[IVX]+\.)[^\S\n\f]+[A-Z][^\n\f]{0,80}"   # 1.2 Numbered
+    r"|[A-Z][A-Z0-9 ,:&'()/-]{2,80}"                              # ALL CAPS
+    r")[^\S\n\f]*(?=\n|\f|\Z)",
+    re.MULTILINE
+)
+
+_MONTHS = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?"
+    r"|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+)
+_DATE = re.compile(
+    r"\b(?=[\dJFMASOND])(?:"
+    r"\d{4}-\d{2}-\d{2}"                                        # 2024-03-12
+    r"|\d{1,2}[/.]\d{1,2}[/.]\d{2,4}"                           # 12/03/2024
+    rf"|\d{{1,2}}\s+{_MONTHS}\.?,?\s+\d{{4}}"                   # 12 March 2024
+    rf"|{_MONTHS}\.?\s+\d{{1,2}},?\s+\d{{4}}"                   # March 12, 2024
+    r")\b"
+)
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "in", "that", "it", "for", "with", "are", "this"},
+    "es": {"el", "la", "de", "que", "y", "los", "las", "en", "por", "con", "una", "para"},
+    "fr": {"le", "la", "les", "de", "des", "et", "est", "une", "pour", "dans", "que", "pas"},
+    "de": {"der", "die", "das", "und", "ist", "nicht", "mit", "ein", "eine", "zu", "den", "auf"},
+    "it": {"il", "di", "che", "e", "la", "per", "non", "sono", "una", "del", "con", "gli"},
+    "pt": {"o", "a", "de", "que", "e", "do", "da", "em", "um", "para", "com", "não"},
+    "nl": {"de", "het", "een", "en", "van", "is", "dat", "niet", "op", "te", "zijn", "met"},
+}
+_STOPWORD_LANGUAGES: Dict[str, List[str]] = {}
+for _language, _words in _STOPWORDS.items():
+    for _word in _words:
+        _STOPWORD_LANGUAGES.setdefault(_word, []).append(_language)
+
+
+def _collapse(match: "re.Match[str]") -> str:
+    breaks = match.group().count("\n")
+    if breaks > 1:
+        return "\n\n"
+    return "\n" if breaks else " "
+
+
+def _normalize(text: str, delete: Dict[int, None] = _DELETE) -> str:
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(_collapse, text.translate(delete))
+
+
+def clean_text(text: str) -> str:
+    """
+    Normalize extracted text for chunking and embedding.
+
+    Applies NFKC (ligatures, full-width forms, non-breaking spaces), drops
+    control and zero-width characters, turns runs of blank lines into one
+    paragraph break and other whitespace runs into a single space. Page
+    breaks (form feeds) are kept so page counts survive cleaning.
+    """
+    return _normalize(text).strip()
+
+
+def clean_texts(texts: Sequence[str]) -> List[str]:
+    """
+    Clean many texts (e.g. pages or chunks) in one pass.
+
+    The texts are joined and normalized together, so the per-call overhead
+    is paid once per batch rather than once per text.
+    """
+    if any(_BATCH_SEPARATOR in text for text in texts):
+        return [clean_text(text) for text in texts]
+    joined = _BATCH_SEPARATOR.join(texts)
+    cleaned = _normalize(joined, _DELETE_BATCH).split(_BATCH_SEPARATOR)
+    return [text.strip() for text in cleaned]
+
+
+def detect_language(text: str) -> str:
+    """Best-guess ISO 639-1 code from stopword frequencies, or ``"unknown"``."""
+    votes: Counter = Counter()
+    for match in _WORD.finditer(text, 0, LANGUAGE_SAMPLE_CHARS):
+        languages = _STOPWORD_LANGUAGES.get(match.group().lower())
+        if languages:
+            votes.update(languages)
+    if not votes:
+        return "unknown"
+    return votes.most_common(1)[0][0]
+
+
+def extract_headings(text: str, limit: int = MAX_HEADINGS) -> List[str]:
+    """Section headings in document order, up to ``limit``."""
+    return [
+        match.group(1).lstrip("#").strip()
+        for match in islice(_HEADING.finditer(text), limit)
+    ]
+
+
+def extract_dates(text: str, limit: int = MAX_DATES) -> List[str]:
+    """Distinct date strings in document order, up to ``limit``."""
+    dates: Dict[str, None] = {}
+    for match in _DATE.finditer(text):
+        dates[match.group()] = None
+        if len(dates) >= limit:
+            break
+    return list(dates)
+
+
+class MetadataCollector:
+    """
+    Builds the same metadata as ``extract_metadata`` from cleaned pages fed
+    one at a time, without holding the whole document.
+    """
+
+    def __init__(self):
+        self.page_count = 0
+        self.word_count = 0
+        self.char_count = 0
+        self._sample: List[str] = []
+        self._sample_chars = 0
+        self._headings: List[str] = []
+        self._dates: Dict[str, None] = {}
+
+    def add(self, page: str) -> None:
+        if self.page_count:
+            self.char_count += len(PAGE_BREAK)
+        self.page_count += page.count(PAGE_BREAK) + 1
+        self.word_count += len(page.split())
+        self.char_count += len(page)
+        if self._sample_chars < LANGUAGE_SAMPLE_CHARS:
+            self._sample.append(page)
+            self._sample_chars += len(page) + len(PAGE_BREAK)
+        if len(self._headings) < MAX_HEADINGS:
+            self._headings += extract_headings(page, MAX_HEADINGS - len(self._headings))
+        if len(self._dates) < MAX_DATES:
+            for date in extract_dates(page):
+                self._dates[date] = None
+                if len(self._dates) >= MAX_DATES:
+                    break
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "language": detect_language(PAGE_BREAK.join(self._sample)),
+            "page_count": self.page_count if self.char_count else 0,
+            "word_count": self.word_count,
+            "char_count": self.char_count,
+            "headings": list(self._headings),
+            "dates": list(self._dates),
+        }
+
+
+def extract_metadata(text: str) -> Dict[str, Any]:
+    """Document-level metadata derived from cleaned text."""
+    return {
+        "language": detect_language(text),
+        "page_count": text.count(PAGE_BREAK) + 1 if text else 0,
+        "word_count": len(text.split()),
+        "char_count": len(text),
+        "headings": extract_headings(text),
+        "dates": extract_dates(text),
+    }
@@ -0,0 +1,130 @@
+"""
+Single-pass text splitter with separator priorities and token-based sizes.
+
+The text is cut once into segments at every separator occurrence, each
+segment is measured once (all token counts in one batched tokenizer call),
+and a greedy pass packs segments into chunks. When a chunk is full it ends
+after the last, strongest separator past the previous chunk's end, which
+gives the same paragraph > line > word preference as LangChain's recursive
+splitter without re-splitting the text at each level.
+"""
+
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+import tiktoken
+from langchain.text_splitter import TextSplitter
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+class LinearTextSplitter(TextSplitter):
+    """Splits text in linear time, measuring chunks in characters or tokens."""
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: Optional[Sequence[str]] = None,
+        encoding: Optional[tiktoken.Encoding] = None,
+        **kwargs: Any
+    ):
+        # Sizes are in tokens when an encoding is given, characters otherwise
+        self.encoding = encoding
+        length_function = self._count_tokens if encoding else len
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            **kwargs
+        )
+        self.separators = [s for s in (separators or DEFAULT_SEPARATORS) if s]
+        self._pattern = re.compile("|".join(re.escape(s) for s in self.separators)) if self.separators else None
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def _measure(self, segments: List[str]) -> List[int]:
+        if self.encoding is None:
+            return [len(segment) for segment in segments]
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(segments)]
+
+    def _segments(self, text: str) -> Tuple[List[str], List[int]]:
+        """
+        Cut ``text`` after every separator.
+
+        Returns the segments (each keeping its trailing separator) and, for
+        each, the priority of that separator (0 is strongest).
+        """
+        if self._pattern is None:
+            return [text], [0]
+        priority = {separator: i for i, separator in enumerate(self.separators)}
+        segments: List[str] = []
+        breaks: List[int] = []
+        start = 0
+        for match in self._pattern.finditer(text):
+            segments.append(text[start:match.end()])
+            breaks.append(priority[match.group()])
+            start = match.end()
+        if start < len(text):
+            segments.append(text[start:])
+            breaks.append(0)
+        return segments, breaks
+
+    def _hard_split(self, segment: str) -> List[str]:
+        """Cut a segment larger than a whole chunk at the size limit."""
+        if self.encoding is None:
+            return [segment[i:i + self._chunk_size] for i in range(0, len(segment), self._chunk_size)]
+        tokens = self.encoding.encode_ordinary(segment)
+        return [
+            self.encoding.decode(tokens[i:i + self._chunk_size])
+            for i in range(0, len(tokens), self._chunk_size)
+        ]
+
+    def _emit(self, chunks: List[str], text: str) -> None:
+        text = text.strip()
+        if text:
+            chunks.append(text)
+
+    def split_text(self, text: str) -> List[str]:
+        segments, breaks = self._segments(text)
+        sizes = self._measure(segments)
+        size, overlap = self._chunk_size, self._chunk_overlap
+        chunks: List[str] = []
+        start, count = 0, len(segments)
+        # End of the previous chunk; the next one must cut after it
+        prev_cut = 0
+        while start < count:
+            # Grow the window, remembering the last break of each priority
+            total, end = 0, start
+            last_break = {}
+            while end < count and total + sizes[end] <= size:
+                total += sizes[end]
+                last_break[breaks[end]] = end
+                end += 1
+            if end == count:
+                self._emit(chunks, "".join(segments[start:end]))
+                break
+            if end == start:
+                # A single segment is larger than a chunk
+                for piece in self._hard_split(segments[start]):
+                    self._emit(chunks, piece)
+                start += 1
+                continue
+            # Only breaks past the previous cut are candidates: the overlap
+            # still holds the break that ended the last chunk
+            candidates = {p: i for p, i in last_break.items() if i >= prev_cut}
+            if not candidates:
+                # The overlap left no room for new text; drop it for this chunk
+                start = prev_cut
+                continue
+            cut = candidates[min(candidates)] + 1
+            prev_cut = cut
+            self._emit(chunks, "".join(segments[start:cut]))
+            # Start the next chunk up to ``overlap`` back, always moving forward
+            next_start, carried = cut, 0
+            while next_start > start + 1 and carried + sizes[next_start - 1] <= overlap:
+                next_start -= 1
+                carried += sizes[next_start]
+            start = next_start
+        return chunks